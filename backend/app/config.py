@@ -7,15 +7,93 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "CWEBKEY"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_HOURS: int = 24
+    TOKEN_CACHE_MAX_ENTRIES: int = 4096  # verified tokens kept until they expire
+    PASSWORD_HASH_ITERATIONS: int = 260_000
 
     # File Upload
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 2 * 1024 * 1024  # 2MB
+    UPLOAD_CHUNK_SIZE: int = 64 * 1024
+    MAX_IMAGES_PER_REQUEST: int = 20
+    UPLOAD_WORKERS: int = 4  # files of one request validated and written at once
+
+    # Image variants - resized copies generated in the background
+    IMAGE_VARIANT_WIDTHS: list = [320, 640, 1280]
+    IMAGE_VARIANT_FORMAT: str = "webp"
+    IMAGE_VARIANT_QUALITY: int = 80
+    IMAGE_WORKERS: int = 2
+    IMAGE_MAX_PIXELS: int = 25_000_000  # larger images are never decoded (decompression bombs)
     ALLOWED_EXTENSIONS: list = ["jpg", "jpeg", "png", "webp"]
 
+    # Pagination
+    DEFAULT_PAGE_SIZE: int = 20
+    MAX_PAGE_SIZE: int = 100
+
+    # Storage reconciler - removes image files no row references
+    RECONCILE_INTERVAL_SECONDS: int = 0  # 0 disables the background job
+    RECONCILE_MODE: str = "quarantine"  # "dry-run", "delete" or "quarantine"
+    RECONCILE_MIN_AGE_SECONDS: int = 3600
+    RECONCILE_RATE: float = 50.0  # files per second
+    RECONCILE_KEEP: list = ["build_pics/default.jpg"]
+
+    # Character stats - periodic check that the trigger-maintained counts match
+    CHARACTER_STATS_RECONCILE_SECONDS: int = 3600  # 0 disables
+
+    # Pending guides SSE feed
+    PENDING_FEED_BUFFER: int = 1000  # events kept for Last-Event-ID replay
+    PENDING_FEED_QUEUE: int = 256  # per client, before a slow client is dropped
+    PENDING_FEED_KEEPALIVE_SECONDS: int = 15
+
+    # Response cache - rendered JSON for approved guides
+    RESPONSE_CACHE_BACKEND: str = "memory"  # "memory" or "redis"
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    RESPONSE_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    RESPONSE_CACHE_TTL: int = 3600
+
+    # Compression - API responses on the fly, static files from sidecars
+    COMPRESSION_MIN_SIZE: int = 1024  # smaller bodies are sent as they are
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4  # 0-11; sidecars always use 11
+    PRECOMPRESS_MIN_SAVING: float = 0.1  # keep sidecars at least 10% smaller
+    STATIC_MAX_AGE: int = 3600  # Cache-Control for static files whose names can be reused
+
+    # Admission control - guide submissions per client, and uploads handled at once
+    RATE_LIMIT_PER_MINUTE: float = 30  # sustained submissions per client; 0 disables
+    RATE_LIMIT_BURST: int = 10
+    LOGIN_RATE_LIMIT_PER_MINUTE: float = 10  # login attempts per client; 0 disables
+    LOGIN_RATE_LIMIT_BURST: int = 5
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" or "redis"
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    RATE_LIMIT_MAX_CLIENTS: int = 10000  # buckets kept by the memory backend
+    TRUST_FORWARDED_FOR: bool = False  # key clients by X-Forwarded-For (behind a proxy)
+    UPLOAD_CONCURRENCY: int = 4  # multipart requests handled at once; 0 disables
+    UPLOAD_QUEUE_SIZE: int = 16  # more waiting than this get a 503
+    UPLOAD_QUEUE_TIMEOUT_SECONDS: float = 10
+
     # Database - FIXED PATH
     BASE_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     DATABASE_URL: str = f"sqlite:///{BASE_DIR}/genshin_builds.db"
+    STATIC_DIR: str = os.path.join(BASE_DIR, "app", "static")
+
+    # Database tuning - SQLite pragmas applied to every connection
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # 256MB
+    SQLITE_CACHE_SIZE: int = -64000  # negative = KiB, so ~64MB per connection
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_READ_ENGINE: bool = True  # separate query_only pool for GET routes
+
+    # Character cache - rewritten by the seed script to invalidate running servers
+    CHARACTER_CATALOG_STAMP: str = f"{BASE_DIR}/character_catalog.version"
+
+    # Orphaned files are moved here when RECONCILE_MODE is "quarantine"
+    QUARANTINE_DIR: str = os.path.join(BASE_DIR, "quarantine")
+
+    # Metrics - requests slower than this are logged with their SQL (0 disables)
+    SLOW_REQUEST_MS: int = 0
 
     # CORS
     FRONTEND_URL: str = "http://localhost:3000"
@@ -1,15 +1,93 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Only for SQLite
-)
 
+def _apply_sqlite_pragmas(dbapi_connection, read_only: bool):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA cache_size = {int(settings.SQLITE_CACHE_SIZE)}")
+    if read_only:
+        cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+
+
+def _pool_args() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+
+
+def _install_pragmas(sync_engine, read_only: bool):
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        _apply_sqlite_pragmas(dbapi_connection, read_only)
+
+
+def make_engine(url: str, read_only: bool = False):
+    """Create an engine using the tuning profile from settings.
+
+    For SQLite every new connection gets the pragmas above; WAL mode lets the
+    GET routes keep reading while a guide is being written, and busy_timeout
+    makes writers wait for the lock instead of failing with "database is
+    locked".
+    """
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_engine(url, **_pool_args())
+
+    new_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},  # Only for SQLite
+        **_pool_args()
+    )
+    _install_pragmas(new_engine, read_only)
+    return new_engine
+
+
+def async_url(url: str) -> str:
+    """Swap the sync SQLite driver for aiosqlite"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.get_driver_name() != "aiosqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+def make_async_engine(url: str, read_only: bool = False):
+    """Async counterpart of ``make_engine`` used by the API routes"""
+    url = async_url(url)
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_async_engine(url, **_pool_args())
+
+    new_engine = create_async_engine(url, poolclass=AsyncAdaptedQueuePool, **_pool_args())
+    _install_pragmas(new_engine.sync_engine, read_only)
+    return new_engine
+
+
+# Sync engine for scripts and background work outside the event loop
+engine = make_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = make_async_engine(settings.DATABASE_URL)
+
+# GET routes read through their own pool so a burst of reads never waits
+# behind writers for a connection
+async_read_engine = (
+    make_async_engine(settings.DATABASE_URL, read_only=True)
+    if settings.DB_READ_ENGINE else async_engine
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency
@@ -18,4 +96,14 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -1,15 +1,41 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from .database import engine, Base
-from .routes import characters, auth, build_guides
+from .database import engine, async_engine, async_read_engine, Base, SessionLocal
+from .middleware.admission import AdmissionMiddleware
+from .middleware.auth import ensure_default_users
+from .middleware.compression import CompressionMiddleware
+from .middleware.metrics import MetricsMiddleware
+from .routes import characters, auth, build_guides, metrics, search
 from .config import settings
+from .services import character_stats
+from .services.content_store import CAS_PREFIX
+from .services.http_cache import ETAG_HEADER, LAST_MODIFIED_HEADER
+from .services.images import shutdown_pool
+from .services.metrics import instrument_engine
+from .services.pagination import NEXT_CURSOR_HEADER
+from .services.pending_feed import FEED_ID_HEADER
+from .services.reconciler import reconcile_periodically
+from .services.search import install_search_index
+from .services.serialization import FastJSONResponse
+from .services.table_versions import install_change_counters
+from .static_files import TIMESTAMPED_NAME, CachedStaticFiles, ImmutableStaticFiles
+import asyncio
 import os
 
 # Create tables
 Base.metadata.create_all(bind=engine)
+install_search_index(engine)
+install_change_counters(engine)
+character_stats.install_character_stats(engine)
+with SessionLocal() as db:
+    ensure_default_users(db)
+for instrumented in {engine, async_engine.sync_engine, async_read_engine.sync_engine}:
+    instrument_engine(instrumented)
 
-app = FastAPI(title="Genshin Build Guide API")
+app = FastAPI(title="Genshin Build Guide API", default_response_class=FastJSONResponse)
+
+# Inside CORS, so browsers can read the 429/503 responses it sends
+app.add_middleware(AdmissionMiddleware)
 
 # CORS
 app.add_middleware(
@@ -21,17 +47,57 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER, LAST_MODIFIED_HEADER, FEED_ID_HEADER, "Retry-After"],
 )
+app.add_middleware(CompressionMiddleware)
+# Added last so it wraps everything, including CORS preflights, and sees the
+# compressed response sizes
+app.add_middleware(MetricsMiddleware)
 
 # Serve uploaded files
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+static_cache_control = f"public, max-age={settings.STATIC_MAX_AGE}"
+app.mount("/uploads", CachedStaticFiles(
+    directory=settings.UPLOAD_DIR, cache_control=static_cache_control, immutable_names=TIMESTAMPED_NAME
+), name="uploads")
+cas_dir = os.path.join(settings.STATIC_DIR, *CAS_PREFIX.split("/"))
+os.makedirs(cas_dir, exist_ok=True)
+app.mount(f"/static/{CAS_PREFIX}", ImmutableStaticFiles(directory=cas_dir), name="cas")
+app.mount("/static", CachedStaticFiles(
+    directory="app/static", cache_control=static_cache_control, immutable_names=TIMESTAMPED_NAME
+), name="static")
 
 # Include routers
 app.include_router(build_guides.router)
 app.include_router(characters.router)
 app.include_router(auth.router)
+app.include_router(search.router)
+app.include_router(metrics.router)
+
+_background_tasks = []
+
+
+@app.on_event("startup")
+async def startup():
+    if settings.RECONCILE_INTERVAL_SECONDS > 0:
+        _background_tasks.append(asyncio.create_task(
+            reconcile_periodically(settings.RECONCILE_INTERVAL_SECONDS)
+        ))
+    if settings.CHARACTER_STATS_RECONCILE_SECONDS > 0:
+        _background_tasks.append(asyncio.create_task(
+            character_stats.reconcile_periodically(engine, settings.CHARACTER_STATS_RECONCILE_SECONDS)
+        ))
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    for task in _background_tasks:
+        task.cancel()
+    shutdown_pool()
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+
 
 @app.get("/")
 async def root():
@@ -0,0 +1,93 @@
+import math
+import re
+
+from starlette.datastructures import Headers
+
+from ..config import settings
+from ..services import metrics
+from ..services.rate_limit import Overloaded, login_limiter, rate_limiter, upload_gate
+from ..services.serialization import dumps
+from .auth import decode_token
+
+# POST /api/guides/ and POST /api/guides/{id}/uploads: the writes anyone can
+# make, each holding a thread, memory and the SQLite write lock. Moderation
+# routes are left alone so a moderator can work through the queue.
+SUBMISSION_PATH = re.compile(r"^/api/guides(/\d+/uploads)?/?$")
+LOGIN_PATH = re.compile(r"^/api/auth/login/?$")
+
+
+def client_key(scope, headers: Headers) -> str:
+    """Who a request counts against: the signed-in user, else the client IP.
+
+    X-Forwarded-For is only trusted with TRUST_FORWARDED_FOR, i.e. behind a
+    proxy that sets it; otherwise anyone could pick a fresh key per request.
+    """
+    authorization = headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        claims = decode_token(authorization[7:].strip())
+        if claims is not None:
+            return f"user:{claims['id']}"
+    if settings.TRUST_FORWARDED_FOR and "x-forwarded-for" in headers:
+        return "ip:" + headers["x-forwarded-for"].split(",")[0].strip()
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+async def _reject(send, status_code: int, detail: str, retry_after: float):
+    body = dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """Keep bursts of submissions from starving the read endpoints.
+
+    Guide submissions and uploads spend a token from their client's bucket
+    and get a 429 when it is empty; login attempts have a bucket of their
+    own. Multipart submissions also need one of UPLOAD_CONCURRENCY slots; a
+    few may queue for one, the rest get a 503. Both answer before the body
+    is read, with a Retry-After header. Reads and moderation are never
+    limited.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        if LOGIN_PATH.match(path):
+            limiter = login_limiter
+        elif SUBMISSION_PATH.match(path):
+            limiter = rate_limiter
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if limiter.enabled:
+            wait = limiter.check(client_key(scope, headers))
+            if wait:
+                metrics.REJECTED.inc("rate_limited")
+                await _reject(send, 429, "Too many requests, please slow down", wait)
+                return
+
+        if limiter is login_limiter or not headers.get("content-type", "").startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+        try:
+            async with upload_gate.admit():
+                await self.app(scope, receive, send)
+        except Overloaded:
+            metrics.REJECTED.inc("overloaded")
+            await _reject(send, 503, "Too many uploads in progress, try again shortly", upload_gate.timeout)
@@ -2,45 +2,154 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+import hashlib
+import hmac
+import os
+import threading
+import time
 from ..config import settings
+from ..models import User
 
 security = HTTPBearer()
 
-# Hardcoded user (dummy datastore)
-USERS_DB = [
+# Accounts created on startup if missing (the login page's test user)
+DEFAULT_USERS = [
     {
-        "id": 1,
         "email": "test@t.ca",
-        "password": "123456Pw",  # In production, hash this!
+        "password": "123456Pw",
         "role": "user"
     }
 ]
 
+HASH_ALGORITHM = "pbkdf2_sha256"
+
+
+def hash_password(password: str, iterations: Optional[int] = None) -> str:
+    """PBKDF2-SHA256 with a random salt, encoded as ``algorithm$iterations$salt$hash``.
+
+    Deliberately slow: call it through ``run_in_threadpool`` from async code.
+    """
+    iterations = iterations or settings.PASSWORD_HASH_ITERATIONS
+    salt = os.urandom(16).hex()
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), iterations)
+    return f"{HASH_ALGORITHM}${iterations}${salt}${digest.hex()}"
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    try:
+        algorithm, iterations, salt, expected = encoded.split("$")
+    except ValueError:
+        return False
+    if algorithm != HASH_ALGORITHM:
+        return False
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), int(iterations))
+    return hmac.compare_digest(digest.hex(), expected)
+
+
+# Checked when the email is unknown, so a miss takes as long as a wrong password
+_DUMMY_HASH = hash_password("dummy password")
+
+
+class TokenCache:
+    """Decoded claims of recently verified tokens, kept until they expire.
+
+    Keyed by a SHA-256 of the whole token, so any change to the token - including
+    its signature - is a miss that goes through full verification. Bounded
+    to ``max_entries``, evicting the least recently used.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, key: bytes) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, claims = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def set(self, key: bytes, claims: dict):
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)) or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (expires_at, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_MAX_ENTRIES)
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(hours=settings.ACCESS_TOKEN_EXPIRE_HOURS)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def decode_token(token: str) -> Optional[dict]:
+    """Claims of a valid token that names a user, or None"""
+    key = TokenCache.key(token)
+    cached = token_cache.get(key)
+    if cached is not None:
+        return dict(cached)
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("id")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials"
-            )
-        return payload
     except JWTError:
+        return None
+    if payload.get("id") is None:
+        return None
+    token_cache.set(key, payload)
+    return dict(payload)
+
+def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    payload = decode_token(credentials.credentials)
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials"
         )
+    return payload
+
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    user = await db.scalar(select(User).where(User.email == email))
+    # Hashing takes a while by design; keep it off the event loop
+    valid = await run_in_threadpool(
+        verify_password, password, user.password_hash if user else _DUMMY_HASH
+    )
+    if user and valid:
+        return {"id": user.id, "email": user.email, "role": user.role}
+    return None
 
-def authenticate_user(email: str, password: str):
-    for user in USERS_DB:
-        if user["email"] == email and user["password"] == password:
-            return {"id": user["id"], "email": user["email"], "role": user["role"]}
-    return None
\ No newline at end of file
+def ensure_default_users(db):
+    """Create the DEFAULT_USERS accounts that don't exist yet"""
+    existing = set(db.scalars(select(User.email)))
+    for user in DEFAULT_USERS:
+        if user["email"] not in existing:
+            db.add(User(
+                email=user["email"],
+                password_hash=hash_password(user["password"]),
+                role=user["role"],
+            ))
+    db.commit()
@@ -0,0 +1,63 @@
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from ..config import settings
+from ..services.compression import compress, is_compressible, negotiate
+
+# Bodies larger than this are compressed in the thread pool, off the event loop
+OFFLOAD_SIZE = 256 * 1024
+
+
+class CompressionMiddleware:
+    """Compress API responses with brotli or gzip, whichever the client prefers.
+
+    Only complete, text-like bodies of at least ``COMPRESSION_MIN_SIZE``
+    bytes are compressed. Streamed responses (the SSE feed, static files)
+    pass through untouched; static files have precompressed sidecars
+    instead. ETags are left alone: the API's are weak already, so the 200
+    and a later 304 carry the same one whatever the encoding.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        start = None
+
+        async def send_wrapper(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            streaming = message.get("more_body", False)
+            status_code = start["status"]
+            if (
+                    is_compressible(headers.get("content-type", ""))
+                    and "content-encoding" not in headers
+                    and status_code >= 200 and status_code not in (204, 206, 304)
+            ):
+                headers.add_vary_header("Accept-Encoding")
+                if encoding and not streaming and len(body) >= settings.COMPRESSION_MIN_SIZE:
+                    if len(body) > OFFLOAD_SIZE:
+                        body = await run_in_threadpool(compress, body, encoding)
+                    else:
+                        body = compress(body, encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+            await send(start)
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
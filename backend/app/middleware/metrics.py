@@ -0,0 +1,83 @@
+import logging
+import time
+
+from ..config import settings
+from ..services import metrics
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_label(scope) -> str:
+    """The route template (``/api/guides/{guide_id}``), never the raw path.
+
+    FastAPI leaves the matched route in the scope. Mounted apps such as the
+    static files have no route, so they are labelled by their mount path.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return scope.get("root_path") or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Record latency, response size and SQL statements for every request.
+
+    Written as plain ASGI middleware so streamed responses are timed until
+    their last chunk and the SQL context variable reaches the endpoint.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Mounted apps rewrite the path, so keep the one the client asked for
+        path = scope["path"]
+        slow_after = settings.SLOW_REQUEST_MS / 1000 if settings.SLOW_REQUEST_MS > 0 else None
+        stats = metrics.start_request(capture=slow_after is not None)
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        metrics.IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.IN_FLIGHT.dec()
+            method = scope["method"]
+            route = route_label(scope)
+            metrics.REQUESTS.inc(method, route, str(status_code))
+            metrics.REQUEST_LATENCY.observe(elapsed, method, route)
+            metrics.RESPONSE_SIZE.observe(size, method, route)
+            metrics.finish_request(stats, method, route)
+            if slow_after is not None and elapsed >= slow_after:
+                self._log_slow(scope, path, elapsed, status_code, stats)
+
+    @staticmethod
+    def _log_slow(scope, path, elapsed, status_code, stats):
+        query = scope.get("query_string", b"").decode("latin-1")
+        if query:
+            path = f"{path}?{query}"
+        lines = [
+            f"Slow request {scope['method']} {path} -> {status_code} in {elapsed * 1000:.1f}ms, "
+            f"{stats.statements} SQL statements ({stats.sql_seconds * 1000:.1f}ms)"
+        ]
+        lines.extend(
+            f"  {duration * 1000:.1f}ms  {' '.join(statement.split())}"
+            for duration, statement in stats.log
+        )
+        logger.warning("\n".join(lines))
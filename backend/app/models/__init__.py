@@ -1,3 +1,6 @@
 from .character import Character
 from .build_guide import BuildGuide
-from .upload import Upload
\ No newline at end of file
+from .upload import Upload
+from .stored_file import StoredFile
+from .user import User
+from .character_stats import CharacterStats
\ No newline at end of file
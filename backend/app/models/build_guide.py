@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
@@ -11,6 +11,11 @@ class GuideStatus(str, enum.Enum):
 
 class BuildGuide(Base):
     __tablename__ = "build_guides"
+    __table_args__ = (
+        # Keyset pagination: newest-first listings per status and per character
+        Index("ix_build_guides_status_created", "status", "created_at", "id"),
+        Index("ix_build_guides_character_status_created", "character_id", "status", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, nullable=False)
@@ -18,8 +23,10 @@ class BuildGuide(Base):
     title = Column(String(100), nullable=False)
     description = Column(Text, nullable=False)
     picture_path = Column(String, nullable=True)
+    picture_variants = Column(JSON, nullable=True)  # {"640w": "build_pics/variants/...", ...}
     status = Column(Enum(GuideStatus), default=GuideStatus.pending)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     character = relationship("Character")
@@ -7,7 +7,7 @@ class Character(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     key = Column(String(100), unique=True, index=True)  # Add this line!
-    name = Column(String(100), nullable=False)
+    name = Column(String(100), nullable=False, index=True)
     title = Column(String(200))
     vision = Column(String(50))
     weapon = Column(String(50))
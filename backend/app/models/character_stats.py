@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from datetime import datetime
+from ..database import Base
+
+
+class CharacterStats(Base):
+    """Guide counts per character, kept current by triggers on build_guides"""
+    __tablename__ = "character_stats"
+
+    character_id = Column(Integer, ForeignKey("characters.id"), primary_key=True)
+    approved_count = Column(Integer, nullable=False, default=0)
+    pending_count = Column(Integer, nullable=False, default=0)
+    latest_guide_id = Column(Integer, nullable=True)  # newest approved guide
+    updated_at = Column(DateTime, default=datetime.utcnow)
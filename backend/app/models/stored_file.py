@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from ..database import Base
+
+
+class StoredFile(Base):
+    """A content-addressed image and how many rows point at it"""
+    __tablename__ = "stored_files"
+
+    path = Column(String(500), primary_key=True)  # relative to the static directory
+    sha256 = Column(String(64), nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
@@ -8,8 +8,9 @@ class Upload(Base):
     __tablename__ = "uploads"
 
     id = Column(Integer, primary_key=True, index=True)
-    build_guide_id = Column(Integer, ForeignKey("build_guides.id"), nullable=False)
+    build_guide_id = Column(Integer, ForeignKey("build_guides.id"), nullable=False, index=True)
     image_path = Column(String(500), nullable=False)
+    image_variants = Column(JSON, nullable=True)
     caption = Column(String(200), nullable=False)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
 
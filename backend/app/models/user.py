@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from ..database import Base
+
+
+class User(Base):
+    __tablename__ = "users"
+
+    id = Column(Integer, primary_key=True, index=True)
+    email = Column(String(255), unique=True, index=True, nullable=False)
+    password_hash = Column(String(255), nullable=False)  # pbkdf2_sha256$iterations$salt$hash
+    role = Column(String(20), nullable=False, default="user")
+    created_at = Column(DateTime, default=datetime.utcnow)
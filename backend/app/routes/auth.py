@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_read_db
 from ..middleware.auth import authenticate_user, create_access_token
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
@@ -11,8 +13,8 @@ class LoginRequest(BaseModel):
 
 
 @router.post("/login")
-async def login(credentials: LoginRequest):
-    user = authenticate_user(credentials.email, credentials.password)
+async def login(credentials: LoginRequest, db: AsyncSession = Depends(get_async_read_db)):
+    user = await authenticate_user(db, credentials.email, credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,150 +1,364 @@
 # app/routes/build_guides.py
 
-import os
-from datetime import datetime
-
-from fastapi import APIRouter, Depends, HTTPException, Form, File, UploadFile, status
-from sqlalchemy.orm import Session
+from functools import partial
+from urllib.parse import urlencode
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Form, File, UploadFile, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
 from pydantic import ValidationError
-from ..database import get_db
-from ..models import BuildGuide, Character
-from ..schemas.build_guide import BuildGuideResponse, BuildGuideFormCreate
+from ..database import get_async_db, get_async_read_db
+from ..config import settings
+from ..models import BuildGuide, Upload
+from ..schemas.build_guide import (
+    BuildGuideResponse,
+    BuildGuideFormCreate,
+    BulkModerationRequest,
+    BulkModerationResponse,
+    UploadCreate,
+    UploadResponse,
+)
+from ..services import content_store
+from ..services.character_cache import character_cache
+from ..services.guides import GuideFilters, get_guide, list_guides
+from ..services.http_cache import make_etag, not_modified, set_validators
+from ..services.images import schedule_variants
+from ..services.moderation import bulk_moderate
+from ..services.pagination import set_next_cursor
+from ..services.pending_feed import FEED_ID_HEADER, pending_feed
+from ..services.response_cache import response_cache
+from ..services.serialization import dumps
+from ..services.table_versions import tables_version
 
 router = APIRouter(prefix="/api/guides", tags=["build_guides"])
 
+# Tables whose writes change what the guide endpoints return
+GUIDE_TABLES = ("build_guides", "uploads")
 
-@router.get("/pending", response_model=List[BuildGuideResponse])
-def get_pending_guides(db: Session = Depends(get_db)):
-    """Get all pending guides awaiting approval"""
-    guides = db.query(BuildGuide).filter(BuildGuide.status == "pending").all()
-    response = []
-    for g in guides:
-        response.append(
-            BuildGuideResponse(
-                id=g.id,
-                username=g.username,
-                character_id=g.character_id,
-                character_name=g.character.name if g.character else "Unknown",
-                title=g.title,
-                description=g.description,
-                picture_path=g.picture_path,
-                created_at=g.created_at.isoformat(),
-                status=g.status,
-                uploads=[
-                    {
-                        "id": u.id,
-                        "image_path": u.image_path,
-                        "caption": u.caption,
-                        "uploaded_at": u.uploaded_at.isoformat()
-                    }
-                    for u in g.uploads
-                ]
+# How long EventSource clients wait before reconnecting to /pending/stream
+RECONNECT_DELAY_MS = 3000
+
+
+async def _guide_validators(request: Request, db: AsyncSession):
+    """ETag, Last-Modified and the versions they are built from, for guide reads.
+
+    The versions are the build_guides and uploads change counters and the
+    character catalog version (responses embed uploads and character
+    names), so a client's cached copy is confirmed with one indexed lookup
+    and no ORM work. They also key the response cache, so a cached body
+    always matches the ETag it is sent with.
+    """
+    versions, last_modified = await tables_version(db, GUIDE_TABLES)
+    catalog = await character_cache.current()
+    versions = (*versions, catalog.version)
+    return make_etag(request, *versions), last_modified, versions
+
+
+async def _existing_variants(db: AsyncSession, paths: List[str]) -> dict:
+    """Variants already generated for any of ``paths``, by path"""
+    if not paths:
+        return {}
+    rows = await db.execute(
+        select(BuildGuide.picture_path, BuildGuide.picture_variants).where(
+            BuildGuide.picture_path.in_(paths), BuildGuide.picture_variants.isnot(None)
+        ).union_all(
+            select(Upload.image_path, Upload.image_variants).where(
+                Upload.image_path.in_(paths), Upload.image_variants.isnot(None)
             )
         )
+    )
+    return {path: variants for path, variants in rows}
+
+
+@router.get("/pending", response_model=List[BuildGuideResponse])
+async def get_pending_guides(
+        request: Request,
+        filters: GuideFilters = Depends(),
+        db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get pending guides awaiting approval, newest first.
+
+    X-Pending-Feed-Id is the feed position taken before the query; passing
+    it to /pending/stream replays anything that changed since, so the list
+    is never missing an update (events already reflected are no-ops).
+    """
+    feed_id = pending_feed.last_event_id
+    etag, last_modified, _ = await _guide_validators(request, db)
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
+    guides, next_cursor = await list_guides(db, "pending", filters)
+    response = Response(content=dumps(guides), media_type="application/json")
+    set_validators(response, etag, last_modified)
+    set_next_cursor(response, next_cursor)
+    response.headers[FEED_ID_HEADER] = feed_id
     return response
 
 
+@router.get("/pending/stream")
+async def stream_pending_guides(request: Request, last_event_id: Optional[str] = None):
+    """Server-Sent Events for the moderation queue.
+
+    ``add`` carries a new guide as returned by GET /{id}; ``remove`` carries
+    ``{"id", "reason"}`` when a pending guide is approved or rejected;
+    ``reset`` means events were missed and the list should be reloaded.
+    Resumes from the Last-Event-ID header (sent by EventSource on
+    reconnect) or the ``last_event_id`` query parameter.
+    """
+    resume_from = request.headers.get("last-event-id") or last_event_id
+
+    async def events():
+        yield f"retry: {RECONNECT_DELAY_MS}\n\n".encode()
+        async for message in pending_feed.subscribe(resume_from):
+            if message is None:
+                if await request.is_disconnected():
+                    return
+                message = b": keepalive\n\n"
+            yield message
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.patch("/{guide_id}/approve")
-def approve_guide(guide_id: int, db: Session = Depends(get_db)):
+async def approve_guide(guide_id: int, db: AsyncSession = Depends(get_async_db)):
     """Approve a pending guide"""
-    guide = db.query(BuildGuide).filter(BuildGuide.id == guide_id).first()
+    guide = await db.get(BuildGuide, guide_id)
     if not guide:
         raise HTTPException(status_code=404, detail="Guide not found")
+    was_pending = guide.status == "pending"
     guide.status = "approved"
-    db.commit()
+    await db.commit()
+    response_cache.invalidate_guide(guide_id)
+    if was_pending:
+        pending_feed.publish_removed(guide_id, "approved")
     return {"detail": "Guide approved"}
 
 
 @router.delete("/{guide_id}")
-def reject_guide(guide_id: int, db: Session = Depends(get_db)):
+async def reject_guide(
+        guide_id: int,
+        background_tasks: BackgroundTasks,
+        db: AsyncSession = Depends(get_async_db)
+):
     """Reject and delete a guide"""
-    guide = db.query(BuildGuide).filter(BuildGuide.id == guide_id).first()
+    # The uploads cascade needs the collection loaded; lazy loads can't run here
+    guide = await db.scalar(
+        select(BuildGuide)
+        .options(selectinload(BuildGuide.uploads))
+        .where(BuildGuide.id == guide_id)
+    )
     if not guide:
         raise HTTPException(status_code=404, detail="Guide not found")
-    db.delete(guide)
-    db.commit()
+    was_approved = guide.status == "approved"
+    released = await content_store.release(
+        db, [guide.picture_path, *(u.image_path for u in guide.uploads)]
+    )
+    await db.delete(guide)
+    await db.commit()
+    response_cache.invalidate_guide(guide_id, approved_list=was_approved)
+    if not was_approved:
+        pending_feed.publish_removed(guide_id, "rejected")
+    background_tasks.add_task(content_store.purge_unreferenced, released)
     return {"detail": "Guide rejected"}
 
 
+@router.post("/bulk", response_model=BulkModerationResponse)
+async def bulk_moderate_guides(
+        request: BulkModerationRequest,
+        background_tasks: BackgroundTasks,
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Approve and reject many guides in one transaction.
+
+    Returns one result per action: approved, rejected, not_found, or
+    duplicate for an id already named earlier in the batch. Image files
+    left without references are deleted after the response is sent.
+    """
+    results, released = await bulk_moderate(db, request.actions)
+    background_tasks.add_task(content_store.purge_unreferenced, released)
+    return BulkModerationResponse(results=results)
+
+
 @router.get("/", response_model=List[BuildGuideResponse])
-def get_all_build_guides(db: Session = Depends(get_db)):
-    """Get all approved build guides"""
-    guides = db.query(BuildGuide).filter(BuildGuide.status == "approved").all()
-    response = []
-
-    for g in guides:
-        response.append(
-            BuildGuideResponse(
-                id=g.id,
-                username=g.username,
-                character_id=g.character_id,
-                character_name=g.character.name if g.character else "Unknown",
-                title=g.title,
-                description=g.description,
-                picture_path=g.picture_path,
-                created_at=g.created_at.isoformat(),
-                status=g.status,
-                uploads=[
-                    {
-                        "id": u.id,
-                        "image_path": u.image_path,
-                        "caption": u.caption,
-                        "uploaded_at": u.uploaded_at.isoformat()
-                    }
-                    for u in g.uploads
-                ],
-            )
-        )
+async def get_all_build_guides(
+        request: Request,
+        response: Response,
+        filters: GuideFilters = Depends(),
+        db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get approved build guides, newest first.
+
+    Pass ``limit`` (and then the ``X-Next-Cursor`` header value as ``cursor``)
+    to page through the results.
+    """
+    # Taken before the session's first read, so whatever the query sees is
+    # at least as new as this generation
+    generation = response_cache.approved_list_generation()
+    etag, last_modified, versions = await _guide_validators(request, db)
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
+
+    # Served as pre-rendered bytes, skipping response_model validation
+    query = urlencode(sorted(request.query_params.multi_items()))
+    cached = response_cache.get_approved_list(query, generation, versions)
+    if cached:
+        body, next_cursor = cached
+    else:
+        guides, next_cursor = await list_guides(db, "approved", filters)
+        body = dumps(guides)
+        response_cache.set_approved_list(query, generation, versions, body, next_cursor)
+
+    response = Response(content=body, media_type="application/json")
+    set_next_cursor(response, next_cursor)
+    set_validators(response, etag, last_modified)
     return response
 
 
 @router.get("/{guide_id}", response_model=BuildGuideResponse)
-def get_build_guide(guide_id: int, db: Session = Depends(get_db)):
+async def get_build_guide(
+        guide_id: int,
+        request: Request,
+        db: AsyncSession = Depends(get_async_read_db)
+):
     """Get a specific guide by ID"""
-    guide = db.query(BuildGuide).filter(BuildGuide.id == guide_id).first()
+    # Before the first read, as in get_all_build_guides
+    generation = response_cache.guide_generation(guide_id)
+    etag, last_modified, versions = await _guide_validators(request, db)
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
+
+    body = response_cache.get_guide(guide_id, generation, versions)
+    if body is None:
+        guide = await get_guide(db, guide_id)
+        if not guide:
+            raise HTTPException(status_code=404, detail="Guide not found")
+        body = dumps(guide)
+        response_cache.set_guide(guide_id, generation, versions, body)
+
+    response = Response(content=body, media_type="application/json")
+    set_validators(response, etag, last_modified)
+    return response
+
+
+@router.post(
+    "/{guide_id}/uploads",
+    response_model=List[UploadResponse],
+    status_code=status.HTTP_201_CREATED,
+)
+async def add_guide_uploads(
+        guide_id: int,
+        images: List[UploadFile] = File(...),
+        captions: List[str] = Form(...),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Attach several images to a guide in one request.
+
+    Send one ``captions`` field per ``images`` file, in the same order.
+    Files are validated and stored concurrently (``UPLOAD_WORKERS`` at a
+    time) and all rows are inserted in one transaction, so either every
+    image is added or none is.
+    """
+    if len(images) != len(captions):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Got {len(images)} images but {len(captions)} captions; send one caption per image"
+        )
+    if len(images) > settings.MAX_IMAGES_PER_REQUEST:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {settings.MAX_IMAGES_PER_REQUEST} images can be uploaded at once"
+        )
+    errors = {}
+    for index, caption in enumerate(captions):
+        try:
+            UploadCreate(caption=caption)
+        except ValidationError as e:
+            errors[f"captions.{index}"] = e.errors()[0]['msg']
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={
+                "validation_errors": errors,
+                "message": "Invalid input data. Please check the errors above."
+            }
+        )
+
+    guide = await db.get(BuildGuide, guide_id)
     if not guide:
         raise HTTPException(status_code=404, detail="Guide not found")
-    character = db.query(Character).filter(Character.id == guide.character_id).first()
-    return BuildGuideResponse(
-        id=guide.id,
-        username=guide.username,
-        character_id=guide.character_id,
-        character_name=character.name if character else "Unknown",
-        title=guide.title,
-        description=guide.description,
-        picture_path=guide.picture_path,
-        created_at=guide.created_at.isoformat(),
-        status=guide.status,
-        uploads=[],
-    )
+    is_approved = guide.status == "approved"
+
+    blobs = await content_store.put_many(images, settings.UPLOAD_WORKERS)
+    # Identical bytes were uploaded before: reuse the variants already made
+    known = await _existing_variants(db, [b.path for b in blobs if not b.created])
+
+    uploads = [
+        Upload(
+            build_guide_id=guide_id,
+            image_path=blob.path,
+            image_variants=known.get(blob.path),
+            caption=caption.strip(),
+        )
+        for blob, caption in zip(blobs, captions)
+    ]
+    try:
+        db.add_all(uploads)
+        await content_store.acquire_all(db, blobs)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        content_store.discard_spares(blobs)
+        await content_store.purge_unreferenced([b.path for b in blobs if b.created])
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save uploads: {str(e)}"
+        )
+
+    response_cache.invalidate_guide(guide_id, approved_list=is_approved)
+    for upload in uploads:
+        if upload.image_variants is None:
+            schedule_variants(
+                Upload, upload.id, upload.image_path, "image_variants",
+                on_stored=partial(response_cache.invalidate_guide, guide_id, approved_list=is_approved),
+            )
+    return uploads
 
 
 @router.put("/{guide_id}/approve")
-def approve_build_guide(guide_id: int, db: Session = Depends(get_db)):
+async def approve_build_guide(guide_id: int, db: AsyncSession = Depends(get_async_db)):
     """Approve a guide (admin use)"""
-    guide = db.query(BuildGuide).filter(BuildGuide.id == guide_id).first()
+    guide = await db.get(BuildGuide, guide_id)
     if not guide:
         raise HTTPException(status_code=404, detail="Guide not found")
 
+    was_pending = guide.status == "pending"
     guide.status = "approved"
-    db.commit()
-    db.refresh(guide)
+    await db.commit()
+    await db.refresh(guide)
+    response_cache.invalidate_guide(guide_id)
+    if was_pending:
+        pending_feed.publish_removed(guide_id, "approved")
     return {"message": f"Guide {guide_id} approved successfully"}
 
 
-UPLOAD_DIR = os.path.join("app", "static", "build_pics")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-
 @router.post("/", response_model=BuildGuideResponse, status_code=status.HTTP_201_CREATED)
-def create_build_guide(
+async def create_build_guide(
         username: str = Form(...),
         character_name: str = Form(...),
         title: str = Form(...),
         description: str = Form(...),
         picture: Optional[UploadFile] = File(None),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
 
@@ -182,106 +396,80 @@ def create_build_guide(
         )
 
 
-    character = db.query(Character).filter(
-        Character.name == validated_data.character_name
-    ).first()
+    # Case, accents and punctuation don't matter ("hu tao" finds "Hu Tao")
+    catalog = await character_cache.current()
+    character_id = catalog.resolve_name(validated_data.character_name)
 
-    if not character:
+    if character_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Character '{validated_data.character_name}' not found in database"
         )
 
 
-    picture_path = None
-    if picture:
-        # Check content type
-        allowed_types = ['image/jpeg', 'image/jpg', 'image/png']
-        if picture.content_type not in allowed_types:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Only JPG, JPEG, and PNG images are allowed. WebP is not supported."
-            )
-
-        # Check for WebP by filename
-        if picture.filename and picture.filename.lower().endswith('.webp'):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="WebP images are not supported. Please upload JPG or PNG."
-            )
-
-        # Read and validate file size
-        try:
-            contents = picture.file.read()
-            file_size = len(contents)
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Failed to read uploaded file: {str(e)}"
-            )
-
-        # Check file size (2MB max)
-        max_size = 2 * 1024 * 1024  # 2MB in bytes
-        if file_size > max_size:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"File size ({file_size / 1024 / 1024:.2f}MB) exceeds maximum allowed size (2MB)"
-            )
-
-        # Check file isn't empty
-        if file_size == 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Uploaded file is empty"
-            )
-
-        # Save file with safe filename
-        timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-        safe_filename = picture.filename.replace(" ", "_") if picture.filename else "upload.jpg"
-        filename = f"{timestamp}_{safe_filename}"
-        save_path = os.path.join("app/static/build_pics", filename)
+    # Validating, hashing and writing the file is blocking disk work
+    blob = await run_in_threadpool(content_store.put, picture) if picture else None
+    picture_path = blob.path if blob else None
 
-        try:
-            with open(save_path, "wb") as f:
-                f.write(contents)
-            picture_path = f"build_pics/{filename}"
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to save file to server: {str(e)}"
-            )
+    # Identical bytes were uploaded before: reuse the variants already made
+    picture_variants = None
+    if blob and not blob.created:
+        picture_variants = await db.scalar(
+            select(BuildGuide.picture_variants).where(
+                BuildGuide.picture_path == picture_path,
+                BuildGuide.picture_variants.isnot(None)
+            ).limit(1)
+        )
 
 
     guide = BuildGuide(
         username=validated_data.username,
-        character_id=character.id,
+        character_id=character_id,
         title=validated_data.title,
         description=validated_data.description,
         picture_path=picture_path,
+        picture_variants=picture_variants,
         status="pending",
     )
 
     try:
         db.add(guide)
-        db.commit()
-        db.refresh(guide)
+        if blob:
+            await content_store.acquire(db, blob)
+        await db.commit()
+        await db.refresh(guide)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
+        content_store.discard_spares([blob])
+        # The file was written for this request; don't leave it behind
+        if blob and blob.created:
+            await content_store.purge_unreferenced([blob.path])
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create guide in database: {str(e)}"
         )
 
+    response_cache.invalidate_guide(guide.id, approved_list=False)
+    if picture_path and not picture_variants:
+        schedule_variants(
+            BuildGuide, guide.id, picture_path, "picture_variants",
+            on_stored=partial(response_cache.invalidate_guide, guide.id),
+        )
+
 
-    return BuildGuideResponse(
-        id=guide.id,
-        username=guide.username,
-        character_id=guide.character_id,
-        character_name=character.name,
-        title=guide.title,
-        description=guide.description,
-        picture_path=guide.picture_path,
-        created_at=guide.created_at.isoformat(),
-        status=guide.status,
-        uploads=[],
-    )
\ No newline at end of file
+    created = dumps({
+        "id": guide.id,
+        "username": guide.username,
+        "character_id": guide.character_id,
+        "character_name": catalog.by_id[character_id]["name"],
+        "title": guide.title,
+        "description": guide.description,
+        "picture_path": guide.picture_path,
+        "picture_variants": guide.picture_variants,
+        "created_at": guide.created_at,
+        "updated_at": guide.updated_at,
+        "status": guide.status,
+        "uploads": [],
+    })
+    pending_feed.publish_added(created.decode())
+    return Response(content=created, status_code=status.HTTP_201_CREATED, media_type="application/json")
\ No newline at end of file
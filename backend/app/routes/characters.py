@@ -1,19 +1,107 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
-from ..models import Character
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from ..database import get_async_read_db
+from ..services.character_cache import CHARACTER_FIELDS, CatalogSnapshot, character_cache
+from ..services.character_stats import load_stats
+from ..services.http_cache import make_etag, not_modified, set_validators
+from ..services.pagination import decode_cursor, encode_cursor, page_size, set_next_cursor
+from ..services.serialization import dumps, parse_fields
+from ..services.table_versions import table_version
 
 router = APIRouter(prefix="/api/characters", tags=["characters"])
 
+# Character data only changes when the seed script runs, so both endpoints
+# answer from the in-process catalog cache instead of querying SQLite, and
+# the catalog version doubles as the validator for conditional requests.
+# with_stats adds one read of character_stats, which changes with the guides.
+
+
+def _validators(request: Request, catalog: CatalogSnapshot, guides_version=None):
+    last_modified = datetime.utcfromtimestamp(catalog.version / 1e9) if catalog.version else None
+    if guides_version is None:
+        return make_etag(request, catalog.version), last_modified
+    version, updated_at = guides_version
+    if updated_at is not None and (last_modified is None or updated_at > last_modified):
+        last_modified = updated_at
+    return make_etag(request, catalog.version, version), last_modified
+
+
 @router.get("/")
-async def get_all_characters(db: Session = Depends(get_db)):
-    characters = db.query(Character).all()
-    return characters
+async def get_all_characters(
+        request: Request,
+        vision: Optional[str] = None,
+        weapon: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = Query(None, ge=1),
+        with_stats: bool = False,
+        fields: Optional[str] = Query(
+            None, description="Comma-separated fields to return, e.g. id,name,vision"
+        ),
+        db: AsyncSession = Depends(get_async_read_db),
+):
+    catalog = await character_cache.current()
+    guides_version = await table_version(db, "build_guides") if with_stats else None
+    etag, last_modified = _validators(request, catalog, guides_version)
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
+
+    limit = page_size(limit, cursor)
+    if not (vision or weapon or limit or with_stats or fields):
+        response = Response(content=catalog.list_json, media_type="application/json")
+        set_validators(response, etag, last_modified)
+        return response
+
+    after_id = None
+    if cursor is not None:
+        after_id = decode_cursor(cursor, (int,))[0]
+    projection = parse_fields(fields, CHARACTER_FIELDS)
+    rows, last_id = catalog.page(vision, weapon, after_id, limit)
+    characters = [{f: row[f] for f in projection} for row in rows]
+    if with_stats:
+        stats = await load_stats(db, [c["id"] for c in characters])
+        for character in characters:
+            character["stats"] = stats[character["id"]]
+    response = Response(content=dumps(characters), media_type="application/json")
+    set_next_cursor(response, encode_cursor(last_id) if last_id is not None else None)
+    set_validators(response, etag, last_modified)
+    return response
+
+
+@router.get("/suggest")
+async def suggest_characters(
+        request: Request,
+        prefix: str = Query(..., min_length=1, max_length=50),
+        limit: int = Query(10, ge=1, le=50),
+):
+    """Typeahead: characters whose name (or any word of it) starts with ``prefix``.
+
+    Matching ignores case, accents and punctuation, and falls back to names
+    within a small edit distance when nothing matches, so "xaio" still
+    finds Xiao. Answered from the in-memory catalog.
+    """
+    catalog = await character_cache.current()
+    etag, last_modified = _validators(request, catalog)
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = Response(
+            content=dumps(catalog.suggest(prefix, limit)), media_type="application/json"
+        )
+        set_validators(response, etag, last_modified)
+    return response
+
 
 @router.get("/{character_id}")
-async def get_character(character_id: int, db: Session = Depends(get_db)):
-    character = db.query(Character).filter(Character.id == character_id).first()
-    if not character:
+async def get_character(character_id: int, request: Request):
+    catalog = await character_cache.current()
+    character = catalog.json_by_id.get(character_id)
+    if character is None:
         raise HTTPException(status_code=404, detail="Character not found")
-    return character
\ No newline at end of file
+    etag, last_modified = _validators(request, catalog)
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = Response(content=character, media_type="application/json")
+        set_validators(response, etag, last_modified)
+    return response
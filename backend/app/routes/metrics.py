@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..services import metrics
+from ..services.rate_limit import upload_gate
+from ..services.response_cache import response_cache
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Request, SQL, cache and admission metrics in the Prometheus text format"""
+    cache = response_cache.stats()
+    body = metrics.render({
+        "response_cache_hits": cache["hits"],
+        "response_cache_misses": cache["misses"],
+        "upload_requests_active": upload_gate.active,
+        "upload_requests_waiting": upload_gate.waiting,
+    })
+    return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
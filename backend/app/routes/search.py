@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional
+from ..config import settings
+from ..database import get_async_read_db
+from ..schemas.search import SearchResponse
+from ..services.search import search
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+@router.get("/", response_model=SearchResponse)
+async def search_guides_and_characters(
+        q: str = Query(..., min_length=1, max_length=100),
+        type: Optional[Literal["guides", "characters"]] = None,
+        limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+        offset: int = Query(0, ge=0, le=1000),
+        db: AsyncSession = Depends(get_async_read_db)
+):
+    """Full-text search over approved guides and characters.
+
+    Every word is prefix-matched, results are ranked by bm25 with titles and
+    names weighted highest, and matches are wrapped in <mark> tags in the
+    ``title_highlight``/``name_highlight`` and ``snippet`` fields. Those
+    fields are HTML-escaped, so they are safe to render as markup; the
+    plain ``title``/``name`` fields are not.
+    """
+    kinds = {type} if type else {"guides", "characters"}
+    results = await search(db, q, kinds, limit, offset)
+    return SearchResponse(query=q, **results)
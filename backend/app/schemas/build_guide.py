@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 
 
 class BuildGuideCreate(BaseModel):
@@ -38,6 +38,7 @@ class UploadCreate(BaseModel):
 class UploadResponse(BaseModel):
     id: int
     image_path: str
+    image_variants: Optional[Dict[str, str]] = None
     caption: str
     uploaded_at: datetime
 
@@ -53,9 +54,30 @@ class BuildGuideResponse(BaseModel):
     title: str
     description: str
     picture_path: Optional[str]
+    picture_variants: Optional[Dict[str, str]] = None
     created_at: str
+    updated_at: Optional[str] = None
     status: Optional[str] = "pending"
     uploads: List[dict] = []
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ModerationAction(BaseModel):
+    id: int
+    action: Literal["approve", "reject"]
+
+
+class BulkModerationRequest(BaseModel):
+    actions: List[ModerationAction] = Field(..., min_length=1, max_length=1000)
+
+
+class ModerationResult(BaseModel):
+    id: int
+    action: str
+    result: str  # approved, rejected, not_found or duplicate
+
+
+class BulkModerationResponse(BaseModel):
+    results: List[ModerationResult]
@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class GuideSearchHit(BaseModel):
+    id: int
+    username: str
+    character_id: int
+    title: str
+    picture_path: Optional[str]
+    title_highlight: str
+    snippet: str
+    rank: float
+
+
+class CharacterSearchHit(BaseModel):
+    id: int
+    name: str
+    title: Optional[str]
+    vision: Optional[str]
+    weapon: Optional[str]
+    name_highlight: str
+    snippet: str
+    rank: float
+
+
+class SearchResponse(BaseModel):
+    query: str
+    guides: List[GuideSearchHit] = []
+    characters: List[CharacterSearchHit] = []
@@ -0,0 +1,155 @@
+import bisect
+import os
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import List, Mapping, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Character
+from .name_index import NameIndex
+from .serialization import dumps
+
+
+# Response fields in output order, for fields= projections
+CHARACTER_FIELDS = tuple(c.name for c in Character.__table__.columns)
+
+# What the typeahead needs to render a choice
+SUGGEST_FIELDS = ("id", "name", "vision", "weapon", "rarity")
+
+
+def bump_catalog_version():
+    """Mark the character catalog as changed.
+
+    Called after anything rewrites the ``characters`` table (the seed script)
+    so every running server rebuilds its cache on the next read.
+    """
+    tmp_path = f"{settings.CHARACTER_CATALOG_STAMP}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(time.time_ns()))
+    os.replace(tmp_path, settings.CHARACTER_CATALOG_STAMP)
+
+
+def _catalog_version() -> int:
+    try:
+        return os.stat(settings.CHARACTER_CATALOG_STAMP).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def _character_row(character: Character) -> dict:
+    return {c.name: getattr(character, c.name) for c in Character.__table__.columns}
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """One immutable copy of the character catalog"""
+    version: int
+    ids: Tuple[int, ...]
+    rows: Tuple[dict, ...]
+    by_id: Mapping[int, dict]
+    json_by_id: Mapping[int, bytes]
+    name_to_id: Mapping[str, int]
+    names: NameIndex
+    list_json: bytes
+
+    @classmethod
+    def build(cls, version: int, characters: List[Character]) -> "CatalogSnapshot":
+        rows = tuple(
+            MappingProxyType(_character_row(c))
+            for c in sorted(characters, key=lambda c: c.id)
+        )
+        return cls(
+            version=version,
+            ids=tuple(r["id"] for r in rows),
+            rows=rows,
+            by_id=MappingProxyType({r["id"]: r for r in rows}),
+            json_by_id=MappingProxyType({r["id"]: dumps(dict(r)) for r in rows}),
+            name_to_id=MappingProxyType({r["name"]: r["id"] for r in rows}),
+            names=NameIndex((r["id"], r["name"]) for r in rows if r["name"]),
+            list_json=dumps([dict(r) for r in rows]),
+        )
+
+    def resolve_name(self, name: str) -> Optional[int]:
+        """Id for a character name, ignoring case, accents and punctuation"""
+        character_id = self.name_to_id.get(name)
+        return character_id if character_id is not None else self.names.lookup(name)
+
+    def suggest(self, prefix: str, limit: int) -> List[dict]:
+        """Short rows for a typeahead, no database access"""
+        return [
+            {field: self.by_id[i][field] for field in SUGGEST_FIELDS}
+            for i in self.names.suggest(prefix, limit)
+        ]
+
+    def page(
+            self,
+            vision: Optional[str] = None,
+            weapon: Optional[str] = None,
+            after_id: Optional[int] = None,
+            limit: Optional[int] = None,
+    ) -> Tuple[List[dict], Optional[int]]:
+        """Filter and page the catalog in id order.
+
+        Returns the matching rows and the id to continue after, which is None
+        on the last page.
+        """
+        start = 0 if after_id is None else bisect.bisect_right(self.ids, after_id)
+        matches = []
+        for row in self.rows[start:]:
+            if vision and row["vision"] != vision:
+                continue
+            if weapon and row["weapon"] != weapon:
+                continue
+            if limit is not None and len(matches) == limit:
+                return matches, matches[-1]["id"]
+            matches.append(row)
+        return matches, None
+
+
+class CharacterCache:
+    """Read-through cache of the ``characters`` table.
+
+    Readers always see a complete snapshot: a rebuild loads the table into a
+    new ``CatalogSnapshot`` and swaps the reference in one assignment. The
+    only per-read cost is a ``stat`` of the version stamp file.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> CatalogSnapshot:
+        version = _catalog_version()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = self._load(version)
+            return self._snapshot
+
+    async def current(self) -> CatalogSnapshot:
+        """``snapshot`` for async routes: a rebuild runs in the thread pool"""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == _catalog_version():
+            return snapshot
+        return await run_in_threadpool(self.snapshot)
+
+    def invalidate(self):
+        self._snapshot = None
+
+    @staticmethod
+    def _load(version: int) -> CatalogSnapshot:
+        db = SessionLocal()
+        try:
+            return CatalogSnapshot.build(version, db.query(Character).all())
+        finally:
+            db.close()
+
+
+character_cache = CharacterCache()
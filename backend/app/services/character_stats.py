@@ -0,0 +1,143 @@
+import asyncio
+import logging
+from typing import Dict, Iterable
+
+from sqlalchemy import select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from ..models import CharacterStats
+
+logger = logging.getLogger(__name__)
+
+# Like the change counters, the stats are kept by triggers so every writer
+# (routes, bulk moderation, seed scripts) updates them in the same
+# transaction. Each trigger touches one or two character_stats rows, and
+# the newest approved guide is found through
+# ix_build_guides_character_status_created rather than a scan.
+
+_LATEST = (
+    "(SELECT id FROM build_guides WHERE character_id = {cid} AND status = 'approved' "
+    "ORDER BY created_at DESC, id DESC LIMIT 1)"
+)
+
+
+def _apply(row: str, sign: str) -> str:
+    """Statements that add (``+``) or remove (``-``) ``row`` from its character's stats"""
+    cid = f"{row}.character_id"
+    return (
+        f"INSERT OR IGNORE INTO character_stats (character_id, approved_count, pending_count) "
+        f"VALUES ({cid}, 0, 0); "
+        f"UPDATE character_stats SET "
+        f"approved_count = approved_count {sign} ({row}.status = 'approved'), "
+        f"pending_count = pending_count {sign} ({row}.status = 'pending'), "
+        f"latest_guide_id = {_LATEST.format(cid=cid)}, "
+        f"updated_at = CURRENT_TIMESTAMP "
+        f"WHERE character_id = {cid};"
+    )
+
+
+TRIGGERS = {
+    "build_guides_stats_insert": f"AFTER INSERT ON build_guides BEGIN {_apply('new', '+')} END",
+    "build_guides_stats_delete": f"AFTER DELETE ON build_guides BEGIN {_apply('old', '-')} END",
+    "build_guides_stats_update": (
+        f"AFTER UPDATE OF status, character_id, created_at ON build_guides BEGIN "
+        f"{_apply('old', '-')} {_apply('new', '+')} END"
+    ),
+}
+
+EXPECTED = f"""
+    SELECT c.id AS character_id,
+           COALESCE(SUM(g.status = 'approved'), 0) AS approved_count,
+           COALESCE(SUM(g.status = 'pending'), 0) AS pending_count,
+           {_LATEST.format(cid='c.id')} AS latest_guide_id
+    FROM characters c
+    LEFT JOIN build_guides g ON g.character_id = c.id
+    GROUP BY c.id
+"""
+
+# Each repair reads and writes in one statement, so a guide approved while
+# it runs is either counted or waits for it; never overwritten by a count
+# read before the trigger ran. "WHERE true" tells SQLite the ON CONFLICT
+# belongs to the INSERT, not to a join in the SELECT.
+REPAIR = text(f"""
+    INSERT INTO character_stats
+        (character_id, approved_count, pending_count, latest_guide_id, updated_at)
+    SELECT character_id, approved_count, pending_count, latest_guide_id, CURRENT_TIMESTAMP
+    FROM ({EXPECTED}) WHERE true
+    ON CONFLICT(character_id) DO UPDATE SET
+        approved_count = excluded.approved_count,
+        pending_count = excluded.pending_count,
+        latest_guide_id = excluded.latest_guide_id,
+        updated_at = excluded.updated_at
+    WHERE approved_count IS NOT excluded.approved_count
+       OR pending_count IS NOT excluded.pending_count
+       OR latest_guide_id IS NOT excluded.latest_guide_id
+""")
+
+REMOVE_STALE = text(
+    "DELETE FROM character_stats WHERE character_id NOT IN (SELECT id FROM characters)"
+)
+
+
+def install_character_stats(engine: Engine):
+    """Create the stats triggers if missing, filling the table when they are new"""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        existing = set(conn.scalars(text(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'build_guides_stats_%'"
+        )))
+        for name, body in TRIGGERS.items():
+            conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {body}"))
+        if existing != set(TRIGGERS):
+            reconcile_character_stats(conn)
+
+
+def reconcile_character_stats(conn: Connection) -> int:
+    """Recompute every character's stats from build_guides and fix any drift.
+
+    Returns how many rows were wrong. Needs one pass over the guides index,
+    so it runs periodically rather than per request.
+    """
+    return conn.execute(REPAIR).rowcount + conn.execute(REMOVE_STALE).rowcount
+
+
+def reconcile_from_engine(engine: Engine) -> int:
+    with engine.begin() as conn:
+        fixed = reconcile_character_stats(conn)
+    if fixed:
+        logger.warning("Character stats: corrected %d rows", fixed)
+    return fixed
+
+
+async def reconcile_periodically(engine: Engine, interval: float):
+    """Run ``reconcile_character_stats`` every ``interval`` seconds until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(reconcile_from_engine, engine)
+        except Exception:
+            logger.exception("Character stats reconcile failed")
+
+
+async def load_stats(db: AsyncSession, character_ids: Iterable[int]) -> Dict[int, dict]:
+    """Stats for the given characters; ones without guides get zeros"""
+    ids = list(character_ids)
+    rows = await db.execute(
+        select(
+            CharacterStats.character_id, CharacterStats.approved_count,
+            CharacterStats.pending_count, CharacterStats.latest_guide_id,
+        ).where(CharacterStats.character_id.in_(ids))
+    )
+    stats = {
+        cid: {"approved_count": 0, "pending_count": 0, "latest_guide_id": None} for cid in ids
+    }
+    for row in rows:
+        stats[row.character_id] = {
+            "approved_count": row.approved_count,
+            "pending_count": row.pending_count,
+            "latest_guide_id": row.latest_guide_id,
+        }
+    return stats
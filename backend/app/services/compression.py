@@ -0,0 +1,112 @@
+import gzip
+import os
+from typing import Dict, Optional
+
+import brotli
+
+from ..config import settings
+
+# Preferred first when the client accepts both equally
+ENCODINGS = ("br", "gzip")
+
+# Precompressed copies sit next to the file as <name>.br and <name>.gz
+SIDECAR_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+_COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+# Bytes compressed as a quick test of whether a whole file is worth it
+_SAMPLE_SIZE = 64 * 1024
+
+
+def is_compressible(content_type: str) -> bool:
+    """Text-like media types; images and archives are compressed already"""
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type == "text/event-stream":
+        # Each event has to reach the client as soon as it is sent
+        return False
+    return media_type.startswith("text/") or media_type in _COMPRESSIBLE_TYPES
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """The encoding from ENCODINGS the client prefers, or None for identity"""
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress ``data``; ``level`` defaults to the fast per-response setting"""
+    if encoding == "br":
+        quality = settings.BROTLI_QUALITY if level is None else level
+        return brotli.compress(data, quality=quality)
+    if encoding == "gzip":
+        level = settings.GZIP_LEVEL if level is None else level
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def write_sidecars(path: str) -> Dict[str, str]:
+    """Write precompressed copies of a static file, once, at the best levels.
+
+    JPEG, PNG and WebP are compressed formats already, so a quick pass over
+    the first 64 KiB skips them without compressing the whole file. Files
+    under COMPRESSION_MIN_SIZE are skipped too, and a sidecar is only kept
+    if it is at least PRECOMPRESS_MIN_SAVING smaller than the original.
+    Returns ``{encoding: sidecar path}``.
+    """
+    threshold = 1 - settings.PRECOMPRESS_MIN_SAVING
+    with open(path, "rb") as f:
+        sample = f.read(_SAMPLE_SIZE)
+        if len(sample) < settings.COMPRESSION_MIN_SIZE:
+            return {}
+        if len(compress(sample, "gzip", 1)) > len(sample) * threshold:
+            return {}
+        data = sample + f.read()
+
+    written = {}
+    for encoding, suffix in SIDECAR_SUFFIXES.items():
+        packed = compress(data, encoding, 11 if encoding == "br" else 9)
+        if len(packed) > len(data) * threshold:
+            continue
+        tmp_path = f"{path}{suffix}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(packed)
+        os.replace(tmp_path, path + suffix)
+        written[encoding] = path + suffix
+    return written
+
+
+def remove_sidecars(path: str):
+    for suffix in SIDECAR_SUFFIXES.values():
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+
+def sidecar_source(path: str) -> Optional[str]:
+    """The file a sidecar was made from, or None if ``path`` is not a sidecar"""
+    for suffix in SIDECAR_SUFFIXES.values():
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return None
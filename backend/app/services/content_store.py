@@ -0,0 +1,233 @@
+import asyncio
+import os
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, delete, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import AsyncSessionLocal
+from ..models import StoredFile
+from .compression import remove_sidecars, write_sidecars
+from .images import VARIANTS_SUBDIR
+from .uploads import check_picture_headers, stream_to_temp
+
+# Content-addressed images live under build_pics/cas/<aa>/<bb>/<sha256>.<ext>.
+# The URL of a blob is derived from its bytes, so it can be cached forever.
+CAS_PREFIX = "build_pics/cas"
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+
+EXTENSIONS = {"jpeg": "jpg", "png": "png"}
+
+
+@dataclass(frozen=True)
+class StoredBlob:
+    path: str  # relative to the static directory
+    sha256: str
+    size: int
+    created: bool  # False when identical content was already stored
+    # When the content was already stored: this upload's own copy, kept
+    # until ``acquire_all`` has taken the reference (see ``put``)
+    spare_path: Optional[str] = None
+
+
+def blob_path(sha256: str, ext: str) -> str:
+    shards = [sha256[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_LEVELS)]
+    return "/".join([CAS_PREFIX, *shards, f"{sha256}.{ext}"])
+
+
+def _absolute(path: str) -> str:
+    return os.path.join(settings.STATIC_DIR, *path.split("/"))
+
+
+def put(picture: UploadFile) -> StoredBlob:
+    """Validate an uploaded picture and store it by content hash.
+
+    The upload is streamed to a temp file under the store root, then renamed
+    into its shard directory. New blobs get their precompressed sidecars
+    here, once. The caller must record the reference with ``acquire`` in
+    the transaction that uses the path.
+
+    If the same bytes are already stored, the existing blob is reused, but
+    the temp file is kept as ``spare_path``: until the reference is taken,
+    a concurrent ``purge_unreferenced`` may still delete the existing file.
+    ``acquire_all`` puts the spare in its place if that happened, and drops
+    it otherwise. Call ``discard_spares`` if the blob is never acquired.
+    """
+    check_picture_headers(picture)
+    root = _absolute(CAS_PREFIX)
+    streamed = stream_to_temp(picture, root)
+
+    path = blob_path(streamed.sha256, EXTENSIONS[streamed.kind])
+    destination = _absolute(path)
+    try:
+        if os.path.exists(destination):
+            return StoredBlob(path, streamed.sha256, streamed.size, False, streamed.tmp_path)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        os.replace(streamed.tmp_path, destination)
+        write_sidecars(destination)
+    except OSError as e:
+        if os.path.exists(streamed.tmp_path):
+            os.unlink(streamed.tmp_path)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save file to server: {str(e)}"
+        )
+    return StoredBlob(path, streamed.sha256, streamed.size, True)
+
+
+async def put_many(pictures: List[UploadFile], workers: int) -> List[StoredBlob]:
+    """``put`` several pictures at once, at most ``workers`` at a time.
+
+    Each file is validated, hashed and written in the thread pool, so the
+    batch takes about as long as its slowest file. If any file fails, the
+    blobs this call created are removed again and the first error is
+    raised with the file's position in its detail.
+    """
+    limit = asyncio.Semaphore(workers)
+
+    async def store(picture: UploadFile) -> StoredBlob:
+        async with limit:
+            return await run_in_threadpool(put, picture)
+
+    outcomes = await asyncio.gather(*(store(p) for p in pictures), return_exceptions=True)
+    failures = [(i, e) for i, e in enumerate(outcomes) if isinstance(e, BaseException)]
+    if failures:
+        stored = [b for b in outcomes if isinstance(b, StoredBlob)]
+        discard_spares(stored)
+        await purge_unreferenced([b.path for b in stored if b.created])
+        index, error = failures[0]
+        if isinstance(error, HTTPException):
+            raise HTTPException(
+                status_code=error.status_code,
+                detail=f"Image {index + 1} ({pictures[index].filename}): {error.detail}",
+            )
+        raise error
+    return outcomes
+
+
+async def acquire(db: AsyncSession, blob: StoredBlob):
+    """Add one reference to a blob (not committed)"""
+    await acquire_all(db, [blob])
+
+
+async def acquire_all(db: AsyncSession, blobs: Iterable[StoredBlob]):
+    """Add one reference per entry in ``blobs`` in a single statement (not committed).
+
+    The upsert takes the database write lock, which ``purge_unreferenced``
+    also holds while it deletes files, so once it returns no purge can be
+    between its check and its unlink. Only then are reused blobs checked on
+    disk: one a purge removed is restored from the upload's spare copy.
+    """
+    blobs = list(blobs)
+    counts = Counter()
+    unique = {}
+    for blob in blobs:
+        counts[blob.path] += 1
+        unique[blob.path] = blob
+    if not unique:
+        return
+    stmt = insert(StoredFile).values([
+        {"path": b.path, "sha256": b.sha256, "size": b.size, "ref_count": counts[b.path]}
+        for b in unique.values()
+    ])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[StoredFile.path],
+        set_={"ref_count": StoredFile.ref_count + stmt.excluded.ref_count},
+    ))
+    await run_in_threadpool(_settle_spares, blobs)
+
+
+def _settle_spares(blobs: List[StoredBlob]):
+    for blob in blobs:
+        if blob.spare_path is None or not os.path.exists(blob.spare_path):
+            continue
+        destination = _absolute(blob.path)
+        if os.path.exists(destination):
+            os.unlink(blob.spare_path)
+        else:
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            os.replace(blob.spare_path, destination)
+            write_sidecars(destination)
+
+
+def discard_spares(blobs: Iterable[Optional[StoredBlob]]):
+    """Drop the spare copies of blobs that will not be acquired"""
+    for blob in blobs:
+        if blob and blob.spare_path and os.path.exists(blob.spare_path):
+            os.unlink(blob.spare_path)
+
+
+async def release(db: AsyncSession, paths: Iterable[Optional[str]]) -> List[str]:
+    """Drop one reference per entry in ``paths`` (not committed).
+
+    Runs the same three statements however many paths are passed. Returns
+    the paths whose last reference went away; once the transaction commits,
+    hand them to ``purge_unreferenced``. Paths that were not stored through
+    the content store are ignored.
+    """
+    counts = Counter(p for p in paths if p and p.startswith(CAS_PREFIX + "/"))
+    if not counts:
+        return []
+    await db.execute(
+        update(StoredFile)
+        .where(StoredFile.path.in_(counts))
+        .values(ref_count=StoredFile.ref_count - case(counts, value=StoredFile.path))
+        .execution_options(synchronize_session=False)
+    )
+    released = list(await db.scalars(
+        select(StoredFile.path).where(StoredFile.path.in_(counts), StoredFile.ref_count <= 0)
+    ))
+    if released:
+        await db.execute(
+            delete(StoredFile)
+            .where(StoredFile.path.in_(released))
+            .execution_options(synchronize_session=False)
+        )
+    return released
+
+
+def remove_blob_files(path: str):
+    """Delete a blob and its variants from disk"""
+    absolute = _absolute(path)
+    if os.path.exists(absolute):
+        os.unlink(absolute)
+    remove_sidecars(absolute)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    variants_dir = os.path.join(os.path.dirname(absolute), VARIANTS_SUBDIR)
+    if os.path.isdir(variants_dir):
+        for entry in os.scandir(variants_dir):
+            if entry.name.startswith(stem + "_"):
+                os.unlink(entry.path)
+
+
+async def purge_unreferenced(paths: List[str]):
+    """Remove released blobs from disk.
+
+    Meant to run as a background task after the response is sent, so it
+    opens its own session. Re-checks the table first, since an upload of
+    the same bytes may have taken a new reference since ``release`` ran.
+    The check and the deletes happen under the database write lock (taken
+    by a no-op write), so an ``acquire_all`` of the same blob either
+    commits first and is seen here, or waits and then finds the file gone
+    and restores it.
+    """
+    if not paths:
+        return
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            delete(StoredFile)
+            .where(StoredFile.path.in_(paths), StoredFile.ref_count <= 0)
+            .execution_options(synchronize_session=False)
+        )
+        live = set(await db.scalars(select(StoredFile.path).where(StoredFile.path.in_(paths))))
+        for path in paths:
+            if path not in live:
+                await run_in_threadpool(remove_blob_files, path)
+        await db.commit()
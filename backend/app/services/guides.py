@@ -0,0 +1,142 @@
+from fastapi import Query
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..models import BuildGuide, Character, Upload
+from .pagination import keyset_page, page_size
+from .serialization import parse_fields
+
+# Response fields in output order. Every one but ``uploads`` is a single
+# column, so a row renders as dict(zip(fields, row)) with no ORM objects or
+# Pydantic models in between.
+GUIDE_FIELDS = (
+    "id", "username", "character_id", "character_name", "title", "description",
+    "picture_path", "picture_variants", "created_at", "updated_at", "status", "uploads",
+)
+
+_GUIDE_COLUMNS = {
+    "id": BuildGuide.id,
+    "username": BuildGuide.username,
+    "character_id": BuildGuide.character_id,
+    "character_name": func.coalesce(Character.name, "Unknown").label("character_name"),
+    "title": BuildGuide.title,
+    "description": BuildGuide.description,
+    "picture_path": BuildGuide.picture_path,
+    "picture_variants": BuildGuide.picture_variants,
+    "created_at": BuildGuide.created_at,
+    "updated_at": BuildGuide.updated_at,
+    "status": BuildGuide.status,
+}
+
+UPLOAD_FIELDS = ("id", "image_path", "image_variants", "caption", "uploaded_at")
+
+# Guides per uploads query, the same batch size selectinload uses
+UPLOAD_BATCH = 500
+
+
+class GuideFilters:
+    """Query parameters shared by the guide list endpoints"""
+
+    def __init__(
+            self,
+            character_id: Optional[int] = None,
+            username: Optional[str] = None,
+            vision: Optional[str] = None,
+            weapon: Optional[str] = None,
+            cursor: Optional[str] = None,
+            limit: Optional[int] = Query(None, ge=1),
+            fields: Optional[str] = Query(
+                None, description="Comma-separated fields to return, e.g. id,title,character_name"
+            ),
+    ):
+        self.character_id = character_id
+        self.username = username
+        self.vision = vision
+        self.weapon = weapon
+        self.cursor = cursor
+        self.limit = limit
+        self.fields = fields
+
+
+def guide_select(fields: Sequence[str]) -> Select:
+    """Select the columns behind ``fields``, in order, then the sort key.
+
+    The characters table is only joined when ``character_name`` is asked for.
+    """
+    columns = [_GUIDE_COLUMNS[f] for f in fields if f != "uploads"]
+    for key in ("created_at", "id"):
+        if key not in fields:
+            columns.append(_GUIDE_COLUMNS[key])
+    stmt = select(*columns).select_from(BuildGuide)
+    if "character_name" in fields:
+        stmt = stmt.outerjoin(Character, Character.id == BuildGuide.character_id)
+    return stmt
+
+
+async def load_uploads(db: AsyncSession, guide_ids: List[int]) -> Dict[int, List[dict]]:
+    """Uploads of each guide in upload order, in one query per UPLOAD_BATCH guides"""
+    uploads = {guide_id: [] for guide_id in guide_ids}
+    columns = [getattr(Upload, f) for f in UPLOAD_FIELDS]
+    for start in range(0, len(guide_ids), UPLOAD_BATCH):
+        rows = await db.execute(
+            select(Upload.build_guide_id, *columns)
+            .where(Upload.build_guide_id.in_(guide_ids[start:start + UPLOAD_BATCH]))
+            .order_by(Upload.id)
+        )
+        for guide_id, *values in rows:
+            uploads[guide_id].append(dict(zip(UPLOAD_FIELDS, values)))
+    return uploads
+
+
+async def render_rows(db: AsyncSession, rows, fields: Sequence[str]) -> List[dict]:
+    """Turn rows of ``guide_select(fields)`` into response dicts"""
+    guides = [dict(zip(fields, row)) for row in rows]
+    if "uploads" in fields:
+        uploads = await load_uploads(db, [row.id for row in rows])
+        for guide in guides:
+            guide["uploads"] = uploads[guide["id"]]
+    return guides
+
+
+async def get_guide(db: AsyncSession, guide_id: int) -> Optional[dict]:
+    """One guide with every field, or None"""
+    rows = (await db.execute(guide_select(GUIDE_FIELDS).where(BuildGuide.id == guide_id))).all()
+    guides = await render_rows(db, rows, GUIDE_FIELDS)
+    return guides[0] if guides else None
+
+
+async def list_guides(
+        db: AsyncSession,
+        status: str,
+        filters: Optional[GuideFilters] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """Get guides with the given status, newest first.
+
+    Returns the page as plain dicts ready for ``serialization.dumps``, and
+    the cursor for the next page, which is None on the last page or when
+    no pagination was requested.
+    """
+    filters = filters or GuideFilters(limit=None)
+    fields = parse_fields(filters.fields, GUIDE_FIELDS)
+    stmt = guide_select(fields).where(BuildGuide.status == status)
+    if filters.character_id is not None:
+        stmt = stmt.where(BuildGuide.character_id == filters.character_id)
+    if filters.username:
+        stmt = stmt.where(BuildGuide.username == filters.username)
+    if filters.vision or filters.weapon:
+        characters = select(Character.id)
+        if filters.vision:
+            characters = characters.where(Character.vision == filters.vision)
+        if filters.weapon:
+            characters = characters.where(Character.weapon == filters.weapon)
+        stmt = stmt.where(BuildGuide.character_id.in_(characters.scalar_subquery()))
+
+    rows, next_cursor = await keyset_page(
+        db,
+        stmt,
+        (BuildGuide.created_at, BuildGuide.id),
+        filters.cursor,
+        page_size(filters.limit, filters.cursor),
+    )
+    return await render_rows(db, rows, fields), next_cursor
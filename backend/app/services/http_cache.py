@@ -0,0 +1,96 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+ETAG_HEADER = "ETag"
+LAST_MODIFIED_HEADER = "Last-Modified"
+
+# Clients may store responses but must revalidate them with If-None-Match
+REVALIDATE = "no-cache"
+
+
+def make_etag(request: Request, *versions) -> str:
+    """Weak ETag for a representation.
+
+    ``versions`` are whatever changes when the underlying data changes (table
+    counters, catalog stamps); the path and query string are mixed in so
+    every filter and page gets its own tag. It is weak because the same
+    data may be sent plain or compressed, and a 304 must carry the tag the
+    200 had whichever encoding that was.
+    """
+    key = "|".join([request.url.path, request.url.query, *map(str, versions)])
+    return 'W/"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+
+def _opaque(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag`` (RFC 9110)"""
+    if header.strip() == "*":
+        return True
+    candidates = (c.strip() for c in header.split(","))
+    return any(_opaque(c) == _opaque(etag) for c in candidates)
+
+
+def not_modified(
+        request: Request,
+        etag: str,
+        last_modified: Optional[datetime] = None,
+) -> Optional[Response]:
+    """Return a 304 response if the client's copy is still current.
+
+    If-None-Match wins over If-Modified-Since, as RFC 9110 requires. While
+    the second of the last write is still running, If-Modified-Since is
+    not trusted and the full response is sent.
+    """
+    last_modified = _settled(last_modified)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = etag_matches(if_none_match, etag)
+    elif last_modified is not None and "if-modified-since" in request.headers:
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"])
+        except (TypeError, ValueError):
+            return None
+        fresh = last_modified.replace(microsecond=0) <= since
+    else:
+        return None
+    if not fresh:
+        return None
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime] = None):
+    """ETag, Cache-Control and, once its second is over, Last-Modified"""
+    response.headers[ETAG_HEADER] = etag
+    response.headers["Cache-Control"] = REVALIDATE
+    last_modified = _settled(last_modified)
+    if last_modified is not None:
+        response.headers[LAST_MODIFIED_HEADER] = format_datetime(last_modified, usegmt=True)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Timestamps in this database are naive UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _settled(last_modified: Optional[datetime]) -> Optional[datetime]:
+    """``last_modified`` in UTC, or None if its second isn't over yet.
+
+    HTTP dates have one-second resolution, so a write later in the same
+    second would carry the same Last-Modified, and a client holding the
+    earlier copy would get a 304 for it.
+    """
+    if last_modified is None:
+        return None
+    last_modified = _as_utc(last_modified)
+    if last_modified.replace(microsecond=0) >= datetime.now(timezone.utc).replace(microsecond=0):
+        return None
+    return last_modified
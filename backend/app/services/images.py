@@ -0,0 +1,196 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional, Tuple
+
+from ..config import settings
+from ..database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_SUBDIR = "variants"
+PLACEHOLDER_WIDTH = 16
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+def render_variants(
+        source: str,
+        out_dir: str,
+        stem: str,
+        widths,
+        fmt: str,
+        quality: int,
+        max_pixels: int,
+) -> Dict[str, str]:
+    """Write downscaled copies of ``source`` into ``out_dir``.
+
+    Runs in a worker process, so it only takes plain arguments and imports
+    Pillow locally. Images are never upscaled: widths at or above the
+    original are skipped, except that at least one full-size re-encode is
+    always produced. Returns ``{label: file name}``, with the widths
+    labelled like ``"640w"`` plus a tiny blurred ``"placeholder"`` JPEG.
+
+    A small file can declare huge dimensions, so the size is checked from
+    the header before any pixels are decoded; images over ``max_pixels``
+    raise ``ImageTooLarge`` rather than take the worker down.
+    """
+    from PIL import Image, ImageFilter, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    ext = "jpg" if fmt == "jpeg" else fmt
+    variants = {}
+    with Image.open(source) as original:
+        if original.width * original.height > max_pixels:
+            raise ImageTooLarge(f"{original.width}x{original.height} is over {max_pixels} pixels")
+        image = ImageOps.exif_transpose(original)
+        if fmt == "jpeg" or image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if fmt != "jpeg" and image.mode in ("LA", "P", "PA") else "RGB")
+
+        targets = sorted(w for w in widths if w < image.width) or [image.width]
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            name = f"{stem}_{width}w.{ext}"
+            resized = image.resize((width, height), Image.LANCZOS)
+            resized.save(os.path.join(out_dir, name), fmt.upper(), quality=quality)
+            variants[f"{width}w"] = name
+
+        height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+        placeholder = image.convert("RGB").resize((PLACEHOLDER_WIDTH, height), Image.BILINEAR)
+        name = f"{stem}_placeholder.jpg"
+        placeholder.filter(ImageFilter.GaussianBlur(1)).save(os.path.join(out_dir, name), "JPEG", quality=40)
+        variants["placeholder"] = name
+    return variants
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn keeps the workers free of the server's threads and open
+            # SQLite connections
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _discard_pool(broken: ProcessPoolExecutor):
+    """Forget ``broken`` so the next job starts a fresh pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(*args) -> Tuple[ProcessPoolExecutor, Future]:
+    """Submit to the pool, replacing it once if a worker died and broke it"""
+    pool = _get_pool()
+    try:
+        return pool, pool.submit(*args)
+    except (BrokenProcessPool, RuntimeError):
+        logger.exception("Image worker pool is unusable; starting a new one")
+        _discard_pool(pool)
+        pool = _get_pool()
+        return pool, pool.submit(*args)
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def schedule_variants(
+        model,
+        row_id: int,
+        relative_path: str,
+        column: str,
+        on_stored: Optional[Callable[[], None]] = None,
+) -> Optional[Future]:
+    """Generate variants of a static image off the request thread.
+
+    ``relative_path`` is relative to the static directory (for example
+    ``build_pics/guide.png``). When the worker finishes, ``column`` on the
+    ``model`` row is set to ``{label: relative path}`` and ``on_stored`` is
+    called.
+
+    Called after the row is committed, so this never raises: if the job
+    can't be queued it is logged and None is returned, and the image is
+    served without variants.
+    """
+    source = os.path.join(settings.STATIC_DIR, relative_path)
+    source_dir = os.path.dirname(relative_path)
+    out_dir = os.path.join(settings.STATIC_DIR, source_dir, VARIANTS_SUBDIR)
+    stem = os.path.splitext(os.path.basename(relative_path))[0]
+
+    try:
+        os.makedirs(out_dir, exist_ok=True)
+        pool, future = _submit(
+            render_variants,
+            source,
+            out_dir,
+            stem,
+            tuple(settings.IMAGE_VARIANT_WIDTHS),
+            settings.IMAGE_VARIANT_FORMAT,
+            settings.IMAGE_VARIANT_QUALITY,
+            settings.IMAGE_MAX_PIXELS,
+        )
+    except Exception:
+        logger.exception("Could not schedule variants for %s", relative_path)
+        return None
+
+    def store(done: Future):
+        if done.cancelled():
+            # Pool shut down before the job ran
+            return
+        try:
+            names = done.result()
+        except FileNotFoundError:
+            # The image was released (its guide rejected) before the worker ran
+            return
+        except BrokenProcessPool:
+            # A worker died (killed, out of memory); later jobs get a new pool
+            logger.exception("Image worker died while generating variants for %s", relative_path)
+            _discard_pool(pool)
+            return
+        except Exception:
+            logger.exception("Failed to generate variants for %s", relative_path)
+            return
+        variants = {
+            label: f"{source_dir}/{VARIANTS_SUBDIR}/{name}" for label, name in names.items()
+        }
+        db = SessionLocal()
+        try:
+            db.query(model).filter(model.id == row_id).update({column: variants})
+            db.commit()
+        finally:
+            db.close()
+        if on_stored:
+            on_stored()
+
+    caller = threading.get_ident()
+
+    def on_done(done: Future):
+        if threading.get_ident() == caller:
+            # The job finished before the callback was added, so this is the
+            # request's thread, i.e. the event loop. Blocking it on the write
+            # lock would stall the request that holds it until busy_timeout.
+            threading.Thread(target=store, args=(done,), daemon=True).start()
+        else:
+            store(done)
+
+    future.add_done_callback(on_done)
+    return future
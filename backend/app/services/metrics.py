@@ -0,0 +1,197 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+MAX_LOGGED_STATEMENTS = 50
+BACKGROUND_ROUTE = "<background>"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {value}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        # labels -> (per-bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._values.items())
+        lines = self.header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+REQUESTS = Counter(
+    "http_requests_total", "Requests handled, by route and status", ("method", "route", "status")
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time to send the full response", ("method", "route")
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size", ("method", "route"), SIZE_BUCKETS
+)
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled")
+REQUEST_STATEMENTS = Histogram(
+    "db_statements_per_request", "SQL statements issued while handling one request",
+    ("method", "route"), STATEMENT_BUCKETS
+)
+REQUEST_SQL_TIME = Histogram(
+    "db_request_sql_seconds", "Time spent in SQL while handling one request", ("method", "route")
+)
+STATEMENTS = Counter("db_statements_total", "SQL statements executed", ("route",))
+STATEMENT_LATENCY = Histogram("db_statement_duration_seconds", "Time to execute one SQL statement")
+REJECTED = Counter(
+    "http_requests_rejected_total", "Submissions and logins turned away by admission control", ("reason",)
+)
+
+REGISTRY: List[_Metric] = [
+    REQUESTS, REQUEST_LATENCY, RESPONSE_SIZE, IN_FLIGHT,
+    REQUEST_STATEMENTS, REQUEST_SQL_TIME, STATEMENTS, STATEMENT_LATENCY, REJECTED,
+]
+
+
+class RequestStats:
+    """SQL issued on behalf of one request.
+
+    Lives in a context variable, so statements run from a threadpool or an
+    async session's greenlet are attributed to the request that caused them.
+    """
+
+    __slots__ = ("statements", "sql_seconds", "log")
+
+    def __init__(self, capture: bool):
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.log: Optional[List[Tuple[float, str]]] = [] if capture else None
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def start_request(capture: bool) -> RequestStats:
+    stats = RequestStats(capture)
+    _current.set(stats)
+    return stats
+
+
+def finish_request(stats: RequestStats, method: str, route: str):
+    REQUEST_STATEMENTS.observe(stats.statements, method, route)
+    REQUEST_SQL_TIME.observe(stats.sql_seconds, method, route)
+    if stats.statements:
+        STATEMENTS.inc(route, amount=stats.statements)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_started
+    STATEMENT_LATENCY.observe(elapsed)
+    stats = _current.get()
+    if stats is None:
+        STATEMENTS.inc(BACKGROUND_ROUTE)
+        return
+    # Counted against the route once the request finishes and its route is known
+    stats.statements += 1
+    stats.sql_seconds += elapsed
+    if stats.log is not None and len(stats.log) < MAX_LOGGED_STATEMENTS:
+        stats.log.append((elapsed, statement))
+
+
+def instrument_engine(sync_engine):
+    """Time every statement the engine executes"""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def render(extra: Optional[Dict[str, float]] = None) -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for name, value in (extra or {}).items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
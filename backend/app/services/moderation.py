@@ -0,0 +1,89 @@
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import BuildGuide, Upload
+from ..schemas.build_guide import ModerationAction, ModerationResult
+from . import content_store
+from .pending_feed import pending_feed
+from .response_cache import response_cache
+
+
+async def bulk_moderate(
+        db: AsyncSession,
+        actions: List[ModerationAction],
+) -> Tuple[List[ModerationResult], List[str]]:
+    """Apply approve/reject actions in one transaction.
+
+    Whatever the batch size, this is one SELECT of the targeted guides, one
+    ``UPDATE ... WHERE id IN`` for approvals, ``DELETE ... WHERE id IN`` for
+    the rejected guides and their uploads, the image reference-count
+    statements and a single commit. Returns a result per action plus the
+    image paths that lost their last reference, for the caller to purge
+    once the response is sent.
+    """
+    requested: Dict[int, str] = {}
+    results = []
+    for item in actions:
+        if item.id in requested:
+            results.append(ModerationResult(id=item.id, action=item.action, result="duplicate"))
+        else:
+            requested[item.id] = item.action
+            results.append(ModerationResult(id=item.id, action=item.action, result="pending"))
+
+    rows = (await db.execute(
+        select(BuildGuide.id, BuildGuide.status, BuildGuide.picture_path)
+        .where(BuildGuide.id.in_(requested))
+    )).all()
+    found = {row.id: row for row in rows}
+
+    approve_ids = [i for i, a in requested.items() if a == "approve" and i in found]
+    reject_ids = [i for i, a in requested.items() if a == "reject" and i in found]
+    rejected_approved = any(found[i].status == "approved" for i in reject_ids)
+
+    released = []
+    if approve_ids:
+        await db.execute(
+            update(BuildGuide)
+            .where(BuildGuide.id.in_(approve_ids))
+            .values(status="approved", updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+    if reject_ids:
+        upload_paths = await db.scalars(
+            select(Upload.image_path).where(Upload.build_guide_id.in_(reject_ids))
+        )
+        picture_paths = [found[i].picture_path for i in reject_ids]
+        released = await content_store.release(db, [*picture_paths, *upload_paths])
+        # Bulk deletes skip the ORM cascade, so remove the uploads explicitly
+        await db.execute(
+            delete(Upload)
+            .where(Upload.build_guide_id.in_(reject_ids))
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            delete(BuildGuide)
+            .where(BuildGuide.id.in_(reject_ids))
+            .execution_options(synchronize_session=False)
+        )
+    await db.commit()
+
+    if approve_ids or reject_ids:
+        response_cache.invalidate_guides(
+            approve_ids + reject_ids,
+            approved_list=bool(approve_ids) or rejected_approved,
+        )
+    for guide_id in approve_ids:
+        if found[guide_id].status == "pending":
+            pending_feed.publish_removed(guide_id, "approved")
+    for guide_id in reject_ids:
+        if found[guide_id].status == "pending":
+            pending_feed.publish_removed(guide_id, "rejected")
+
+    outcome = {"approve": "approved", "reject": "rejected"}
+    for result in results:
+        if result.result == "pending":
+            result.result = outcome[result.action] if result.id in found else "not_found"
+    return results, released
@@ -0,0 +1,113 @@
+import bisect
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Tuple
+
+_SEPARATORS = re.compile(r"[\W_]+", re.UNICODE)
+# Highest key code point, so ``prefix + _MAX`` sorts after every key with that prefix
+_MAX = "\U0010ffff"
+
+
+def normalize(name: str) -> str:
+    """Lower-case, accent-free form with punctuation collapsed to single spaces.
+
+    "Kaedehara Kazuha", "kaedehara-kazuha" and "KAEDEHARA  Kazuha" all
+    normalize the same, as do "Lynette" and "Lynétte".
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _SEPARATORS.sub(" ", stripped.casefold()).strip()
+
+
+def _bounded_distance(a: str, b: str, limit: int) -> int:
+    """Edit distance of ``a`` and ``b``, or ``limit + 1`` once it exceeds ``limit``.
+
+    Optimal string alignment: insertions, deletions, substitutions and
+    swapping two adjacent letters ("xaio" -> "xiao") each cost one.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            )
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class NameIndex:
+    """Sorted array of normalized names for prefix lookups with bisect.
+
+    Every word of a name is indexed as well, so "tao" finds "Hu Tao". When
+    no key starts with the prefix, names whose start is within a small edit
+    distance of it are returned instead, which catches most typos.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[int, str]]):
+        keys = []
+        self._names = []
+        for ident, name in entries:
+            normalized = normalize(name)
+            self._names.append((ident, normalized))
+            words = normalized.split(" ")
+            for start in range(len(words)):
+                # Whole-name matches rank ahead of later-word matches
+                keys.append((" ".join(words[start:]), start, ident))
+        keys.sort()
+        self._keys = keys
+        self._sort_keys = [key for key, _, _ in keys]
+
+    def lookup(self, name: str) -> Optional[int]:
+        """Id of the name that normalizes exactly like ``name``, if any"""
+        normalized = normalize(name)
+        i = bisect.bisect_left(self._sort_keys, normalized)
+        while i < len(self._keys) and self._sort_keys[i] == normalized:
+            key, start, ident = self._keys[i]
+            if start == 0:
+                return ident
+            i += 1
+        return None
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[int]:
+        """Ids of names matching ``prefix``, best matches first"""
+        query = normalize(prefix)
+        if not query:
+            return []
+        lo = bisect.bisect_left(self._sort_keys, query)
+        hi = bisect.bisect_right(self._sort_keys, query + _MAX, lo)
+        if lo < hi:
+            matches = sorted(self._keys[lo:hi], key=lambda k: (k[1], k[0]))
+            return self._unique(ident for _, _, ident in matches)[:limit]
+        return self._fuzzy(query, limit)
+
+    def _fuzzy(self, query: str, limit: int) -> List[int]:
+        allowed = 1 if len(query) <= 4 else 2
+        scored = []
+        for ident, name in self._names:
+            for word_start, candidate in enumerate(self._starts(name)):
+                distance = _bounded_distance(query, candidate[:len(query)], allowed)
+                if distance <= allowed:
+                    scored.append((distance, word_start, name, ident))
+        scored.sort()
+        return self._unique(ident for _, _, _, ident in scored)[:limit]
+
+    @staticmethod
+    def _starts(name: str) -> List[str]:
+        words = name.split(" ")
+        return [" ".join(words[i:]) for i in range(len(words))]
+
+    @staticmethod
+    def _unique(idents: Iterable[int]) -> List[int]:
+        seen = set()
+        return [i for i in idents if not (i in seen or seen.add(i))]
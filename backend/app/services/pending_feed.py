@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+from collections import deque
+from typing import AsyncIterator, Deque, Optional, Set, Tuple
+
+from ..config import settings
+
+# Sent as the X-Pending-Feed-Id header on GET /pending so a client can open
+# the stream exactly where its snapshot of the list ends.
+FEED_ID_HEADER = "X-Pending-Feed-Id"
+
+
+class PendingFeed:
+    """In-process broadcaster for changes to the moderation queue.
+
+    Routes publish ``add`` and ``remove`` events after they commit. Every
+    connected client gets its own bounded queue, and the last
+    ``buffer_size`` events are kept so a reconnecting client can resume
+    from its Last-Event-ID. When that id is too old, or came from a
+    different server process, the client gets a ``reset`` event and should
+    refetch the list once; the stream carries on from the reset, so it must
+    not reconnect.
+
+    Event ids are ``<epoch>-<sequence>``. The epoch is random per process, so
+    ids from before a restart are never mistaken for current ones.
+
+    The feed only sees writes made by its own process. Run a single worker
+    when moderators rely on it: with several, a client only hears about the
+    changes made through the worker its stream happens to be connected to.
+    """
+
+    def __init__(self, buffer_size: int, queue_size: int):
+        self.epoch = os.urandom(4).hex()
+        self.queue_size = queue_size
+        self._sequence = 0
+        self._buffer: Deque[Tuple[int, bytes]] = deque(maxlen=buffer_size)
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    @property
+    def last_event_id(self) -> str:
+        return f"{self.epoch}-{self._sequence}"
+
+    def publish(self, event: str, data) -> None:
+        self._sequence += 1
+        payload = json.dumps(data, separators=(",", ":")) if not isinstance(data, str) else data
+        message = (
+            f"id: {self.epoch}-{self._sequence}\nevent: {event}\ndata: {payload}\n\n"
+        ).encode()
+        self._buffer.append((self._sequence, message))
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too far behind: end its stream; the client reconnects and
+                # replays from its Last-Event-ID
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def publish_added(self, guide_json: str) -> None:
+        self.publish("add", guide_json)
+
+    def publish_removed(self, guide_id: int, reason: str) -> None:
+        self.publish("remove", {"id": guide_id, "reason": reason})
+
+    def _replay(self, last_event_id: Optional[str]) -> Optional[list]:
+        """Buffered messages after ``last_event_id``, or None if they are gone"""
+        if not last_event_id:
+            return []
+        epoch, _, sequence = last_event_id.partition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        after = int(sequence)
+        if after > self._sequence:
+            return None
+        oldest = self._buffer[0][0] if self._buffer else self._sequence + 1
+        if after < oldest - 1:
+            return None
+        return [message for seq, message in self._buffer if seq > after]
+
+    async def subscribe(self, last_event_id: Optional[str]) -> AsyncIterator[Optional[bytes]]:
+        """Yield SSE messages for one client; None means nothing happened for a while.
+
+        Replay and registration happen without awaiting in between, so no
+        event published meanwhile can be missed or sent twice.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        backlog = self._replay(last_event_id)
+        if backlog is None:
+            backlog = [
+                f"id: {self.last_event_id}\nevent: reset\ndata: {{}}\n\n".encode()
+            ]
+        self._subscribers.add(queue)
+        try:
+            for message in backlog:
+                yield message
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        queue.get(), settings.PENDING_FEED_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self._subscribers.discard(queue)
+
+
+pending_feed = PendingFeed(settings.PENDING_FEED_BUFFER, settings.PENDING_FEED_QUEUE)
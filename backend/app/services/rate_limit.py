@@ -0,0 +1,171 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Protocol, Tuple
+
+from ..config import settings
+
+
+class BucketBackend(Protocol):
+    """Where token buckets live; ``take`` must be atomic per key"""
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """Spend one token; return 0 if there was one, else seconds until there is"""
+        ...
+
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: int) -> float:
+    return min(burst, tokens + max(0.0, now - updated) * rate)
+
+
+class MemoryBuckets:
+    """In-process buckets; the default backend.
+
+    Each server process keeps its own, so with several workers a client gets
+    up to the limit per worker; use a shared backend to enforce one limit.
+    At most ``max_entries`` clients are tracked, forgetting the least
+    recently seen (who then start again with a full bucket).
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = _refill(tokens, updated, now, rate, burst)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+# Refill and spend in one round trip, so concurrent workers can't both take
+# the last token. The wait is returned as a string: Redis would truncate a
+# Lua number to an integer.
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    """Buckets shared by every worker, over a redis-py style client.
+
+    Keys expire once a bucket would be full again, so idle clients cost
+    nothing.
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.prefix = prefix
+        self._take = client.register_script(_TAKE_SCRIPT)
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        return float(self._take(keys=[self.prefix + key], args=[rate, burst, time.time()]))
+
+
+def make_backend() -> BucketBackend:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        # Optional dependency, only needed for a shared limit
+        import redis
+        return RedisBuckets(redis.Redis.from_url(settings.RATE_LIMIT_REDIS_URL))
+    return MemoryBuckets(settings.RATE_LIMIT_MAX_CLIENTS)
+
+
+class RateLimiter:
+    """Token bucket per client: ``per_minute`` sustained, bursts of ``burst``.
+
+    Limiters sharing a backend keep separate buckets, told apart by ``name``.
+    """
+
+    def __init__(self, backend: BucketBackend, name: str, per_minute: float, burst: int):
+        self.backend = backend
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = max(1, burst)
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def check(self, client: str) -> float:
+        """0 if ``client`` may go ahead, else seconds to wait"""
+        return self.backend.take(f"{self.name}:{client}", self.rate, self.burst)
+
+
+class Overloaded(Exception):
+    pass
+
+
+class ConcurrencyGate:
+    """At most ``limit`` requests inside at once, and at most ``queue_size`` waiting.
+
+    A request that finds the queue full, or waits longer than ``timeout``
+    seconds for a slot, gets ``Overloaded`` straight away instead of piling
+    up threads, memory and SQLite write locks behind the others.
+    """
+
+    def __init__(self, limit: int, queue_size: int, timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit) if limit > 0 else None
+
+    @asynccontextmanager
+    async def admit(self):
+        if self._semaphore is None:
+            yield
+            return
+        if self._semaphore.locked():
+            if self.waiting >= self.queue_size:
+                raise Overloaded
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                raise Overloaded
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+
+_buckets = make_backend()
+rate_limiter = RateLimiter(_buckets, "submit", settings.RATE_LIMIT_PER_MINUTE, settings.RATE_LIMIT_BURST)
+login_limiter = RateLimiter(
+    _buckets, "login", settings.LOGIN_RATE_LIMIT_PER_MINUTE, settings.LOGIN_RATE_LIMIT_BURST
+)
+upload_gate = ConcurrencyGate(
+    settings.UPLOAD_CONCURRENCY, settings.UPLOAD_QUEUE_SIZE, settings.UPLOAD_QUEUE_TIMEOUT_SECONDS
+)
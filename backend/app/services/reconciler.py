@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import select, union
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import BuildGuide, StoredFile, Upload
+from .compression import sidecar_source
+from .images import VARIANTS_SUBDIR
+
+logger = logging.getLogger(__name__)
+
+SOURCE_EXTENSIONS = ("png", "jpg", "jpeg", "webp")
+
+
+@dataclass
+class ReconcileReport:
+    scanned: int = 0
+    referenced: int = 0
+    skipped: int = 0  # too new, kept by name, or in-flight temp files
+    orphans: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+
+
+def storage_roots() -> List[Tuple[str, str]]:
+    """``(directory, path prefix)`` pairs whose files the database references.
+
+    Guide pictures are stored relative to the static directory (for example
+    ``build_pics/cas/...``); files in ``UPLOAD_DIR`` are referenced as
+    ``uploads/<name>``.
+    """
+    return [
+        (os.path.join(settings.STATIC_DIR, "build_pics"), "build_pics/"),
+        (os.path.abspath(settings.UPLOAD_DIR), "uploads/"),
+    ]
+
+
+def walk_files(directory: str, prefix: str) -> Iterator[Tuple[str, os.DirEntry]]:
+    """Yield ``(relative path, entry)`` for every file below ``directory``.
+
+    Uses an explicit stack of ``os.scandir`` iterators, so memory stays
+    proportional to the directory depth rather than the number of files.
+    """
+    if not os.path.isdir(directory):
+        return
+    stack = [(directory, prefix)]
+    while stack:
+        current, current_prefix = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, f"{current_prefix}{entry.name}/"))
+                elif entry.is_file(follow_symlinks=False):
+                    yield f"{current_prefix}{entry.name}", entry
+
+
+def _referenced(db, paths: List[str]) -> Set[str]:
+    """The subset of ``paths`` that any row still points at"""
+    stmt = union(
+        select(BuildGuide.picture_path).where(BuildGuide.picture_path.in_(paths)),
+        select(Upload.image_path).where(Upload.image_path.in_(paths)),
+        select(StoredFile.path).where(StoredFile.path.in_(paths)),
+    )
+    return set(db.scalars(stmt))
+
+
+def _variant_has_source(entry: os.DirEntry) -> bool:
+    """A variant is live while the image it was rendered from exists"""
+    stem = entry.name.rsplit("_", 1)[0]
+    source_dir = os.path.dirname(os.path.dirname(entry.path))
+    return any(
+        os.path.exists(os.path.join(source_dir, f"{stem}.{ext}")) for ext in SOURCE_EXTENSIONS
+    )
+
+
+class Reconciler:
+    """Find image files no database row references and delete or quarantine them.
+
+    Files are checked against the database in batches of ``batch_size``.
+    Anything younger than ``min_age`` seconds is skipped, so uploads that
+    are written but not yet committed are left alone. ``rate`` caps how
+    many orphans are removed per second.
+    """
+
+    def __init__(
+            self,
+            mode: str = "dry-run",  # "dry-run", "delete" or "quarantine"
+            batch_size: int = 500,
+            min_age: float = 3600,
+            rate: Optional[float] = None,
+            quarantine_dir: Optional[str] = None,
+            keep: Tuple[str, ...] = (),
+    ):
+        if mode not in ("dry-run", "delete", "quarantine"):
+            raise ValueError(f"Unknown reconcile mode: {mode}")
+        self.mode = mode
+        self.batch_size = batch_size
+        self.min_age = min_age
+        self.rate = rate
+        self.quarantine_dir = quarantine_dir or settings.QUARANTINE_DIR
+        self.keep = set(keep)
+        self._last_action = 0.0
+
+    def run(self) -> ReconcileReport:
+        report = ReconcileReport()
+        cutoff = time.time() - self.min_age
+        batch: List[Tuple[str, os.DirEntry]] = []
+        db = SessionLocal()
+        try:
+            for root, prefix in storage_roots():
+                for relative, entry in walk_files(root, prefix):
+                    report.scanned += 1
+                    if relative in self.keep or entry.stat().st_mtime > cutoff:
+                        report.skipped += 1
+                    elif sidecar_source(entry.path) is not None:
+                        # A precompressed copy lives as long as its original
+                        if os.path.exists(sidecar_source(entry.path)):
+                            report.referenced += 1
+                        else:
+                            self._orphan(relative, entry.path, report)
+                    elif f"/{VARIANTS_SUBDIR}/" in relative:
+                        if _variant_has_source(entry):
+                            report.referenced += 1
+                        else:
+                            self._orphan(relative, entry.path, report)
+                    else:
+                        batch.append((relative, entry))
+                        if len(batch) >= self.batch_size:
+                            self._check_batch(db, batch, report)
+                            batch = []
+            if batch:
+                self._check_batch(db, batch, report)
+        finally:
+            db.close()
+        return report
+
+    def _check_batch(self, db, batch, report: ReconcileReport):
+        referenced = _referenced(db, [relative for relative, _ in batch])
+        for relative, entry in batch:
+            if relative in referenced:
+                report.referenced += 1
+            else:
+                self._orphan(relative, entry.path, report)
+
+    def _orphan(self, relative: str, path: str, report: ReconcileReport):
+        report.orphans.append(relative)
+        if self.mode == "dry-run":
+            return
+        self._throttle()
+        try:
+            if self.mode == "delete":
+                os.unlink(path)
+            else:
+                target = os.path.join(self.quarantine_dir, *relative.split("/"))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(path, target)
+        except OSError as e:
+            logger.warning("Could not %s %s: %s", self.mode, relative, e)
+            report.failed.append(relative)
+
+    def _throttle(self):
+        if not self.rate:
+            return
+        wait = self._last_action + 1 / self.rate - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_action = time.monotonic()
+
+
+def reconcile_from_settings() -> ReconcileReport:
+    """One pass of the background reconciler, configured by settings"""
+    report = Reconciler(
+        mode=settings.RECONCILE_MODE,
+        min_age=settings.RECONCILE_MIN_AGE_SECONDS,
+        rate=settings.RECONCILE_RATE,
+        keep=tuple(settings.RECONCILE_KEEP),
+    ).run()
+    logger.info(
+        "Storage reconcile: %d scanned, %d orphaned (%s), %d failed",
+        report.scanned, len(report.orphans), settings.RECONCILE_MODE, len(report.failed),
+    )
+    return report
+
+
+async def reconcile_periodically(interval: float):
+    """Run the reconciler every ``interval`` seconds until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(reconcile_from_settings)
+        except Exception:
+            logger.exception("Storage reconcile failed")
@@ -0,0 +1,191 @@
+import secrets
+import threading
+from collections import OrderedDict
+from typing import Optional, Protocol, Sequence, Tuple
+
+from ..config import settings
+
+APPROVED_LIST_GENERATION = "guides:approved:gen"
+
+
+class CacheBackend(Protocol):
+    """The subset of the Redis command set the response cache relies on"""
+
+    def get(self, key: str) -> Optional[bytes]: ...
+
+    def set(self, key: str, value: bytes) -> None: ...
+
+    def delete(self, *keys: str) -> None: ...
+
+
+class MemoryBackend:
+    """In-process LRU store; the default backend.
+
+    Each server process has its own copy. Entries are keyed by the table
+    change counters, so a write through another worker still turns them
+    into misses, but every worker renders and holds its own copy.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class RedisBackend:
+    """Backend over a redis-py style client (or any fake with the same API).
+
+    Entries expire after ``ttl`` seconds and Redis' own maxmemory LRU policy
+    bounds the total size.
+    """
+
+    def __init__(self, client, ttl: int, prefix: str = "responses:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*(self.prefix + k for k in keys))
+
+
+def _stamp(generation: bytes, versions: Sequence[int]) -> bytes:
+    return generation + b"".join(b":%d" % v for v in versions)
+
+
+def _pack(stamp: bytes, next_cursor: Optional[str], body: bytes) -> bytes:
+    return b"%s\n%s\n%s" % (stamp, (next_cursor or "").encode(), body)
+
+
+def _unpack(value: bytes) -> Tuple[bytes, Optional[str], bytes]:
+    stamp, next_cursor, body = value.split(b"\n", 2)
+    return stamp, next_cursor.decode() or None, body
+
+
+class ResponseCache:
+    """Rendered JSON for the approved guide list and guide details.
+
+    Entries are invalidated explicitly by the write routes, which give a
+    generation key a new random token: one key for the approved list (so
+    a single write retires every cached page and filter combination) and
+    one per guide for its detail. A reader takes the generation *before*
+    querying and stores its result under it, so a write that lands between
+    the query and the store leaves the entry already stale instead of
+    serving old data under the new generation.
+
+    Each entry also records ``versions``: the change counters of the tables
+    it was read from and the character catalog version, the same values
+    the ETag is built from and read at the same time. A write committed by
+    any process, including another worker whose invalidation never reaches
+    this cache, or a re-seed, changes them and turns the entry into a
+    miss, so a body is never sent under a newer ETag than its data.
+
+    Generation keys share the backend's LRU bound with the entries. One
+    that was evicted is unknown rather than zero: the reader puts a fresh
+    token there first, which no stored entry can carry.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def _generation(self, key: str) -> bytes:
+        generation = self.backend.get(key)
+        if generation is None:
+            generation = self._retire(key)
+        return generation
+
+    def _retire(self, key: str) -> bytes:
+        generation = secrets.token_hex(8).encode()
+        self.backend.set(key, generation)
+        return generation
+
+    def _get(self, key: str, generation: bytes, versions: Sequence[int]):
+        value = self.backend.get(key)
+        if value is not None:
+            stamp, next_cursor, body = _unpack(value)
+            if stamp == _stamp(generation, versions):
+                self.hits += 1
+                return body, next_cursor
+        self.misses += 1
+        return None
+
+    def approved_list_generation(self) -> bytes:
+        """Read before querying; pass to ``get_approved_list``/``set_approved_list``"""
+        return self._generation(APPROVED_LIST_GENERATION)
+
+    def get_approved_list(self, query: str, generation: bytes, versions: Sequence[int]):
+        """Cached ``(body, next_cursor)`` for a list query, or None"""
+        return self._get(f"guides:approved:{query}", generation, versions)
+
+    def set_approved_list(
+            self,
+            query: str,
+            generation: bytes,
+            versions: Sequence[int],
+            body: bytes,
+            next_cursor: Optional[str],
+    ):
+        self.backend.set(f"guides:approved:{query}", _pack(_stamp(generation, versions), next_cursor, body))
+
+    def guide_generation(self, guide_id: int) -> bytes:
+        """Read before querying; pass to ``get_guide``/``set_guide``"""
+        return self._generation(f"guide:{guide_id}:gen")
+
+    def get_guide(self, guide_id: int, generation: bytes, versions: Sequence[int]) -> Optional[bytes]:
+        cached = self._get(f"guide:{guide_id}", generation, versions)
+        return cached[0] if cached else None
+
+    def set_guide(self, guide_id: int, generation: bytes, versions: Sequence[int], body: bytes):
+        self.backend.set(f"guide:{guide_id}", _pack(_stamp(generation, versions), None, body))
+
+    def invalidate_guide(self, guide_id: int, approved_list: bool = True):
+        """Retire a guide's detail and, if it is or was approved, the list pages"""
+        self.invalidate_guides([guide_id], approved_list)
+
+    def invalidate_guides(self, guide_ids, approved_list: bool = True):
+        for guide_id in guide_ids:
+            self._retire(f"guide:{guide_id}:gen")
+        self.backend.delete(*(f"guide:{guide_id}" for guide_id in guide_ids))
+        if approved_list:
+            self._retire(APPROVED_LIST_GENERATION)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def make_backend() -> CacheBackend:
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        # Optional dependency, only needed for a shared cache
+        import redis
+        return RedisBackend(redis.Redis.from_url(settings.RESPONSE_CACHE_REDIS_URL), settings.RESPONSE_CACHE_TTL)
+    return MemoryBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+response_cache = ResponseCache(make_backend())
@@ -0,0 +1,145 @@
+import html
+import re
+from typing import List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# External-content FTS5 indexes: the text lives only in the real tables and
+# the triggers below keep the token index in step on every write.
+FTS_TABLES = {
+    "build_guides_fts": ("build_guides", ("title", "description")),
+    "characters_fts": ("characters", ("name", "title", "description")),
+}
+
+# Column weights for bm25(), in FTS column order
+GUIDE_WEIGHTS = (5.0, 1.0)
+CHARACTER_WEIGHTS = (10.0, 3.0, 1.0)
+
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+# What FTS5 wraps matches in. The text around them is user-written, so it
+# is HTML-escaped first and only then are these swapped for the tags.
+_MATCH_OPEN = "\x02"
+_MATCH_CLOSE = "\x03"
+HIGHLIGHTED_FIELDS = ("title_highlight", "name_highlight", "snippet")
+SNIPPET_TOKENS = 12
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _ddl(fts: str, source: str, columns) -> List[str]:
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{source}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+    ]
+
+
+def install_search_index(engine: Engine):
+    """Create the FTS5 tables and sync triggers if they are missing.
+
+    A newly created index is filled from its source table with the FTS5
+    'rebuild' command, so existing databases become searchable on the next
+    start. Only SQLite is supported.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    existing = set(inspect(engine).get_table_names())
+    with engine.begin() as conn:
+        for fts, (source, columns) in FTS_TABLES.items():
+            for statement in _ddl(fts, source, columns):
+                conn.execute(text(statement))
+            if fts not in existing:
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def to_match_query(q: str) -> str:
+    """Turn free text into an FTS5 query that prefix-matches every word.
+
+    Each word is quoted, so operators and punctuation typed by users are
+    treated as plain text instead of FTS5 syntax.
+    """
+    return " ".join(f'"{token}"*' for token in TOKEN_RE.findall(q))
+
+
+def _weights(weights) -> str:
+    return ", ".join(str(w) for w in weights)
+
+
+GUIDE_SEARCH = text(f"""
+    SELECT g.id, g.username, g.character_id, g.title, g.picture_path,
+           highlight(build_guides_fts, 0, :open, :close) AS title_highlight,
+           snippet(build_guides_fts, 1, :open, :close, '…', {SNIPPET_TOKENS}) AS snippet,
+           bm25(build_guides_fts, {_weights(GUIDE_WEIGHTS)}) AS rank
+    FROM build_guides_fts
+    JOIN build_guides AS g ON g.id = build_guides_fts.rowid
+    WHERE build_guides_fts MATCH :match AND g.status = 'approved'
+    ORDER BY rank, g.id
+    LIMIT :limit OFFSET :offset
+""")
+
+CHARACTER_SEARCH = text(f"""
+    SELECT c.id, c.name, c.title, c.vision, c.weapon,
+           highlight(characters_fts, 0, :open, :close) AS name_highlight,
+           snippet(characters_fts, -1, :open, :close, '…', {SNIPPET_TOKENS}) AS snippet,
+           bm25(characters_fts, {_weights(CHARACTER_WEIGHTS)}) AS rank
+    FROM characters_fts
+    JOIN characters AS c ON c.id = characters_fts.rowid
+    WHERE characters_fts MATCH :match
+    ORDER BY rank, c.id
+    LIMIT :limit OFFSET :offset
+""")
+
+
+def mark_matches(value: str) -> str:
+    """Escape FTS5 highlight output as HTML, wrapping the matches in <mark>"""
+    return (
+        html.escape(value)
+        .replace(_MATCH_OPEN, HIGHLIGHT_OPEN)
+        .replace(_MATCH_CLOSE, HIGHLIGHT_CLOSE)
+    )
+
+
+def _render(rows) -> List[dict]:
+    results = []
+    for row in rows.mappings():
+        result = dict(row)
+        for field in HIGHLIGHTED_FIELDS:
+            if result.get(field) is not None:
+                result[field] = mark_matches(result[field])
+        results.append(result)
+    return results
+
+
+async def search(db: AsyncSession, q: str, kinds, limit: int, offset: int) -> dict:
+    """Rank approved guides and characters against ``q`` with bm25"""
+    results = {"guides": [], "characters": []}
+    match = to_match_query(q)
+    if not match:
+        return results
+    params = {
+        "match": match,
+        "open": _MATCH_OPEN,
+        "close": _MATCH_CLOSE,
+        "limit": limit,
+        "offset": offset,
+    }
+    if "guides" in kinds:
+        rows = await db.execute(GUIDE_SEARCH, params)
+        results["guides"] = _render(rows)
+    if "characters" in kinds:
+        rows = await db.execute(CHARACTER_SEARCH, params)
+        results["characters"] = _render(rows)
+    return results
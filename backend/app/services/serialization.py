@@ -0,0 +1,37 @@
+from typing import Optional, Sequence, Tuple
+
+import orjson
+from fastapi import HTTPException, status
+from starlette.responses import JSONResponse
+
+
+def dumps(value) -> bytes:
+    """Compact JSON bytes; datetimes become ISO 8601 strings like ``isoformat()``"""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; the app's default response class"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Tuple[str, ...]:
+    """Resolve a ``fields=a,b,c`` projection against ``allowed``.
+
+    Returns every allowed field when ``fields`` is not given. ``id`` is
+    always included, and fields come back in ``allowed`` order so each
+    projection renders with a stable key order.
+    """
+    if fields is None:
+        return tuple(allowed)
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Choose from: {', '.join(allowed)}"
+        )
+    requested.add("id")
+    return tuple(f for f in allowed if f in requested)
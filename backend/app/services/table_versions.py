@@ -0,0 +1,77 @@
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Tables whose writes bump a change counter. The counters are maintained by
+# triggers, so every writer (routes, seed scripts, background jobs) is
+# covered without any application code remembering to do it. Guide
+# responses embed their uploads, so uploads are tracked as well.
+TRACKED_TABLES = ("build_guides", "uploads")
+
+# Last write time to the millisecond; CURRENT_TIMESTAMP only has seconds
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+def _trigger(table: str, event: str) -> str:
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} "
+        f"AFTER {event} ON {table} BEGIN "
+        f"UPDATE table_versions SET version = version + 1, "
+        f"updated_at = {NOW} WHERE name = '{table}'; END"
+    )
+
+
+def install_change_counters(engine: Engine):
+    """Create the table_versions table and its triggers if missing.
+
+    Triggers from before millisecond timestamps are replaced.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS table_versions ("
+            "name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0, "
+            f"updated_at TEXT NOT NULL DEFAULT ({NOW}))"
+        ))
+        triggers = dict(conn.execute(text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'")).all())
+        for table in TRACKED_TABLES:
+            conn.execute(
+                text("INSERT OR IGNORE INTO table_versions (name) VALUES (:name)"),
+                {"name": table},
+            )
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                name = f"{table}_version_{event.lower()}"
+                if name in triggers and NOW not in triggers[name]:
+                    conn.execute(text(f"DROP TRIGGER {name}"))
+                conn.execute(text(_trigger(table, event)))
+
+
+async def table_version(db: AsyncSession, table: str) -> Tuple[int, Optional[datetime]]:
+    """Current change counter and last write time for ``table``"""
+    row = (await db.execute(
+        text("SELECT version, updated_at FROM table_versions WHERE name = :name"),
+        {"name": table},
+    )).first()
+    if row is None:
+        return 0, None
+    return row.version, datetime.fromisoformat(row.updated_at)
+
+
+async def tables_version(
+        db: AsyncSession,
+        tables: Sequence[str],
+) -> Tuple[Tuple[int, ...], Optional[datetime]]:
+    """Change counters for several tables in one query, and the latest write time"""
+    rows = (await db.execute(
+        text("SELECT name, version, updated_at FROM table_versions WHERE name IN :names")
+        .bindparams(bindparam("names", expanding=True)),
+        {"names": list(tables)},
+    )).all()
+    found = {row.name: row for row in rows}
+    versions = tuple(found[t].version if t in found else 0 for t in tables)
+    written = [datetime.fromisoformat(row.updated_at) for row in rows]
+    return versions, max(written, default=None)
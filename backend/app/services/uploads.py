@@ -0,0 +1,84 @@
+import hashlib
+import os
+import tempfile
+from typing import NamedTuple
+
+from fastapi import HTTPException, UploadFile, status
+
+from ..config import settings
+
+ALLOWED_CONTENT_TYPES = ['image/jpeg', 'image/jpg', 'image/png']
+
+# File signatures checked against the first chunk of every upload
+JPEG_MAGIC = b"\xff\xd8\xff"
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+
+def _bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def sniff_image_type(head: bytes):
+    """Return "jpeg" or "png" from the file signature, or None"""
+    if head.startswith(JPEG_MAGIC):
+        return "jpeg"
+    if head.startswith(PNG_MAGIC):
+        return "png"
+    return None
+
+
+def check_picture_headers(picture: UploadFile):
+    """Reject uploads whose declared type or name is not JPG/PNG"""
+    if picture.content_type not in ALLOWED_CONTENT_TYPES:
+        raise _bad_request("Only JPG, JPEG, and PNG images are allowed. WebP is not supported.")
+
+    if picture.filename and picture.filename.lower().endswith('.webp'):
+        raise _bad_request("WebP images are not supported. Please upload JPG or PNG.")
+
+
+class StreamedUpload(NamedTuple):
+    tmp_path: str
+    sha256: str
+    kind: str
+    size: int
+
+
+def stream_to_temp(picture: UploadFile, directory: str) -> StreamedUpload:
+    """Copy an upload into a temp file in ``directory`` one chunk at a time.
+
+    Only one chunk is held in memory, and the SHA-256 of the content is
+    computed on the way through. The copy stops as soon as the upload passes
+    ``settings.MAX_FILE_SIZE`` or its first chunk does not carry a JPEG/PNG
+    signature; the partial temp file is removed in both cases.
+    """
+    max_mb = settings.MAX_FILE_SIZE / 1024 / 1024
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    digest = hashlib.sha256()
+    kind = None
+    try:
+        with os.fdopen(fd, "wb") as out:
+            size = 0
+            while True:
+                try:
+                    chunk = picture.file.read(settings.UPLOAD_CHUNK_SIZE)
+                except Exception as e:
+                    raise _bad_request(f"Failed to read uploaded file: {str(e)}")
+                if not chunk:
+                    break
+                if size == 0:
+                    kind = sniff_image_type(chunk)
+                    if kind is None:
+                        raise _bad_request("Uploaded file is not a valid JPG or PNG image.")
+                size += len(chunk)
+                if size > settings.MAX_FILE_SIZE:
+                    raise _bad_request(f"File size exceeds maximum allowed size ({max_mb:g}MB)")
+                digest.update(chunk)
+                out.write(chunk)
+
+        if size == 0:
+            raise _bad_request("Uploaded file is empty")
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return StreamedUpload(tmp_path, digest.hexdigest(), kind, size)
@@ -0,0 +1,257 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Pattern, Tuple
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from .services.compression import SIDECAR_SUFFIXES, negotiate
+from .services.http_cache import etag_matches
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Uploads saved before content addressing are named <YYYYmmddHHMMSS>_<name>
+# and were never rewritten in place
+TIMESTAMPED_NAME = re.compile(r"^\d{14}_")
+
+# Content-addressed names are the SHA-256 of the bytes, so no need to hash them
+_HASH_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+# Files described per process; each entry is a few hundred bytes
+FILE_INFO_CACHE_SIZE = 4096
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class FileInfo:
+    etag: str
+    # encoding -> (sidecar path, its stat) for the precompressed copies present
+    sidecars: Dict[str, Tuple[str, os.stat_result]] = field(default_factory=dict)
+
+
+def describe_file(path: str) -> FileInfo:
+    """Strong ETag from the file's content, plus its precompressed sidecars"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if _HASH_NAME.match(stem):
+        digest = stem
+    else:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+    sidecars = {}
+    for encoding, suffix in SIDECAR_SUFFIXES.items():
+        try:
+            sidecars[encoding] = (path + suffix, os.stat(path + suffix))
+        except FileNotFoundError:
+            pass
+    return FileInfo(etag=f'"{digest[:32]}"', sidecars=sidecars)
+
+
+class FileInfoCache:
+    """``describe_file`` results keyed by path, size and mtime, LRU-bounded"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, FileInfo]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, path: str, stat_result: os.stat_result) -> FileInfo:
+        key = (path, stat_result.st_size, stat_result.st_mtime_ns)
+        with self._lock:
+            info = self._entries.get(key)
+            if info is not None:
+                self._entries.move_to_end(key)
+                return info
+        info = await anyio.to_thread.run_sync(describe_file, path)
+        with self._lock:
+            self._entries[key] = info
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return info
+
+
+file_info_cache = FileInfoCache(FILE_INFO_CACHE_SIZE)
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """First and last byte of a single ``bytes=`` range.
+
+    Returns None for anything else (multiple ranges, other units, garbage),
+    in which case the whole file is sent, as RFC 9110 allows.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0:
+                raise RangeNotSatisfiable
+            return max(0, size - suffix), size - 1
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+class FileRangeResponse(FileResponse):
+    """206 response carrying bytes ``start`` to ``end`` (inclusive) of a file"""
+
+    def __init__(self, path: str, start: int, end: int, stat_result: os.stat_result, **kwargs):
+        super().__init__(path, status_code=206, stat_result=stat_result, **kwargs)
+        self.start = start
+        self.end = end
+        self.headers["content-length"] = str(end - start + 1)
+        self.headers["content-range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            remaining = self.end - self.start + 1
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # The file shrank under us; end the body rather than hang
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class CachedStaticFiles(StaticFiles):
+    """Static files with content-based ETags, Range requests and precompressed sidecars.
+
+    The ETag is derived from the file's bytes (hashed once per size and
+    mtime), so it only changes when the content does. When ``<name>.br`` or
+    ``<name>.gz`` sits next to a file and the client accepts that encoding,
+    the sidecar is sent instead. Range requests get the plain file.
+    ``immutable_names`` matches file names that never change content; they
+    get IMMUTABLE_CACHE_CONTROL instead of ``cache_control``.
+    """
+
+    def __init__(self, *, cache_control: str, immutable_names: Optional[Pattern] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.cache_control = cache_control
+        self.immutable_names = immutable_names
+
+    def file_response(self, full_path, stat_result, scope, status_code=200) -> Response:
+        # Validators and ranges are handled in get_response, which can await
+        return FileResponse(full_path, status_code=status_code, stat_result=stat_result, method=scope["method"])
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        if not isinstance(response, FileResponse) or response.status_code != 200:
+            return response
+        full_path, stat_result = str(response.path), response.stat_result
+        info = await file_info_cache.get(full_path, stat_result)
+        request_headers = Headers(scope=scope)
+        range_header = request_headers.get("range")
+
+        encoding = None
+        if info.sidecars and range_header is None:
+            encoding = negotiate(request_headers.get("accept-encoding", ""))
+            if encoding not in info.sidecars:
+                encoding = None
+        etag = info.etag if encoding is None else f'{info.etag[:-1]}-{encoding}"'
+
+        headers = {
+            "etag": etag,
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "cache-control": self._cache_control(full_path),
+            "accept-ranges": "bytes",
+        }
+        if info.sidecars:
+            headers["vary"] = "Accept-Encoding"
+
+        if self._not_modified(request_headers, etag, stat_result):
+            return Response(status_code=304, headers=headers)
+
+        method = scope["method"]
+        if encoding is not None:
+            sidecar_path, sidecar_stat = info.sidecars[encoding]
+            headers["content-encoding"] = encoding
+            return FileResponse(
+                sidecar_path, stat_result=sidecar_stat, method=method,
+                media_type=response.media_type, headers=headers,
+            )
+        if range_header is not None and self._range_applies(request_headers, etag, stat_result):
+            try:
+                byte_range = parse_range(range_header, stat_result.st_size)
+            except RangeNotSatisfiable:
+                headers["content-range"] = f"bytes */{stat_result.st_size}"
+                return Response(status_code=416, headers=headers)
+            if byte_range is not None:
+                return FileRangeResponse(
+                    full_path, *byte_range, stat_result=stat_result, method=method,
+                    media_type=response.media_type, headers=headers,
+                )
+        return FileResponse(
+            full_path, stat_result=stat_result, method=method,
+            media_type=response.media_type, headers=headers,
+        )
+
+    def _cache_control(self, full_path: str) -> str:
+        if self.immutable_names and self.immutable_names.match(os.path.basename(full_path)):
+            return IMMUTABLE_CACHE_CONTROL
+        return self.cache_control
+
+    @staticmethod
+    def _not_modified(request_headers: Headers, etag: str, stat_result: os.stat_result) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            return etag_matches(if_none_match, etag)
+        since = request_headers.get("if-modified-since")
+        if since is None:
+            return False
+        try:
+            return int(stat_result.st_mtime) <= parsedate_to_datetime(since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    @staticmethod
+    def _range_applies(request_headers: Headers, etag: str, stat_result: os.stat_result) -> bool:
+        """If-Range: only send a part if the client's copy is still the current one"""
+        if_range = request_headers.get("if-range")
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(('"', "W/")):
+            return if_range == etag
+        try:
+            return int(stat_result.st_mtime) == int(parsedate_to_datetime(if_range).timestamp())
+        except (TypeError, ValueError):
+            return False
+
+
+class ImmutableStaticFiles(CachedStaticFiles):
+    """Static files whose content never changes at a given URL.
+
+    Used for content-addressed uploads, where the file name is the hash of
+    the bytes, so browsers and proxies may cache them for a year without
+    revalidating.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(cache_control=IMMUTABLE_CACHE_CONTROL, **kwargs)
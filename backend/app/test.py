@@ -1,6 +0,0 @@
-from app.database import SessionLocal
-from app.models import BuildGuide
-
-db = SessionLocal()
-print(db.query(BuildGuide).all())
-db.close()
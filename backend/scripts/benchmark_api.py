@@ -0,0 +1,394 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_WORKDIR = os.path.join(BACKEND_DIR, ".bench")
+
+# Add parent directory to path so we can import from app
+sys.path.append(BACKEND_DIR)
+
+# Run as a script, so the scripts directory is already on the path
+from generate_fixtures import VISIONS, WORDS, generate
+
+BENCH_DB = "bench.db"
+FIXTURE_DB = "fixture.db"
+
+
+def configure_environment(workdir):
+    """Point the app at a throwaway database and static directory.
+
+    Must run before anything from ``app`` is imported, since settings are
+    read once at import time. Uploads from an earlier run are cleared so
+    they aren't mistaken for duplicates.
+    """
+    static_dir = os.path.join(workdir, "static")
+    uploads_dir = os.path.join(workdir, "uploads")
+    for directory in (static_dir, uploads_dir):
+        shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(os.path.join(static_dir, "build_pics"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, BENCH_DB)}"
+    os.environ["STATIC_DIR"] = static_dir
+    os.environ["UPLOAD_DIR"] = uploads_dir
+    os.environ["CHARACTER_CATALOG_STAMP"] = os.path.join(workdir, "character_catalog.version")
+    # Every benchmark request comes from one client; measure the API, not the limiter
+    os.environ["RATE_LIMIT_PER_MINUTE"] = "0"
+    os.environ["UPLOAD_CONCURRENCY"] = "0"
+    # The app mounts app/static relative to the working directory
+    os.chdir(BACKEND_DIR)
+
+
+def log(message, **kwargs):
+    """Progress goes to stderr; stdout carries only the JSON report"""
+    print(message, file=sys.stderr, **kwargs)
+
+
+def _remove_database(path):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def prepare_database(workdir, guides, characters, seed):
+    """Give every run an identical starting database.
+
+    The seeded database is kept as ``fixture.db`` and copied over
+    ``bench.db`` before each run, since the create and moderation scenarios
+    change it. The fixture is rebuilt when the seeding options change.
+    """
+    fixture = os.path.join(workdir, FIXTURE_DB)
+    bench = os.path.join(workdir, BENCH_DB)
+    params_path = os.path.join(workdir, "fixture.json")
+    params = {"guides": guides, "characters": characters, "seed": seed}
+
+    _remove_database(bench)
+    if os.path.exists(fixture) and os.path.exists(params_path):
+        with open(params_path) as f:
+            if json.load(f) == params:
+                log(f" Reusing fixture with {guides} guides")
+                shutil.copyfile(fixture, bench)
+                return
+
+    generate(guides, characters=characters, seed=seed, log=log)
+    from app.database import engine
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    shutil.copyfile(bench, fixture)
+    with open(params_path, "w") as f:
+        json.dump(params, f)
+
+
+def png_bytes(index):
+    """A small PNG whose bytes differ per call, so uploads aren't deduplicated"""
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 64), (index % 256, index // 256 % 256, index // 65536 % 256)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def is_locked_error(error):
+    """True for SQLite's "database is locked", raised in-process or sent as a 500"""
+    if isinstance(error, Exception):
+        return "database is locked" in str(error)
+    return error.status_code == 500 and "database is locked" in error.text
+
+
+async def run_scenario(make_request, count, concurrency):
+    """Issue ``count`` requests, ``concurrency`` at a time; return the summary"""
+    latencies = []
+    errors = locked_errors = 0
+    counter = iter(range(count))
+
+    async def worker():
+        nonlocal errors, locked_errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await make_request(i)
+                ok = response.status_code < 400
+                error = response
+            except Exception as exc:
+                ok = False
+                error = exc
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+                locked_errors += is_locked_error(error)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        "requests": count,
+        "errors": errors,
+        "locked_errors": locked_errors,
+        "rps": round(count / elapsed, 1) if elapsed else None,
+        "mean_ms": ms(statistics.fmean(latencies)) if latencies else None,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+    }
+
+
+async def run_writers(client, writers, stop, seed, characters):
+    """Create and approve guides from ``writers`` tasks until ``stop`` is set"""
+    summary = {"writers": writers, "requests": 0, "errors": 0, "locked_errors": 0}
+    rng = random.Random(seed)
+
+    async def request(send):
+        summary["requests"] += 1
+        try:
+            response = await send()
+        except Exception as exc:
+            summary["errors"] += 1
+            summary["locked_errors"] += is_locked_error(exc)
+            return None
+        if response.status_code >= 400:
+            summary["errors"] += 1
+            summary["locked_errors"] += is_locked_error(response)
+            return None
+        return response
+
+    async def writer(w):
+        n = 0
+        while not stop.is_set():
+            created = await request(lambda: client.post(
+                "/api/guides/",
+                data={
+                    "username": f"writer{w}",
+                    "character_name": f"Character {rng.randint(1, characters)}",
+                    "title": f"Concurrent guide {w}-{n}",
+                    "description": "Written by the benchmark while readers are running.",
+                },
+                files={"picture": (f"w{w}-{n}.png", png_bytes(seed * 100_000 + w * 10_000 + n), "image/png")},
+            ))
+            if created is not None:
+                await request(lambda: client.patch(f"/api/guides/{created.json()['id']}/approve"))
+            n += 1
+
+    await asyncio.gather(*(writer(w) for w in range(writers)))
+    return summary
+
+
+async def run_suite(client, requests, concurrency, seed, characters, writers):
+    rng = random.Random(seed)
+    results = {}
+
+    async def scenario(name, make_request, count=requests):
+        log(f" {name}...", end=" ", flush=True)
+        results[name] = await run_scenario(make_request, count, concurrency)
+        log(f"{results[name]['rps']} req/s, p95 {results[name]['p95_ms']}ms")
+
+    first_page = await client.get("/api/guides/", params={"limit": 100})
+    first_page.raise_for_status()
+    approved_ids = [guide["id"] for guide in first_page.json()]
+    cursor = first_page.headers.get("X-Next-Cursor")
+    if not approved_ids:
+        raise SystemExit(" No approved guides to benchmark against")
+
+    await scenario("list_first_page", lambda i: client.get("/api/guides/", params={"limit": 20}))
+    if cursor:
+        await scenario("list_next_page", lambda i: client.get(
+            "/api/guides/", params={"limit": 20, "cursor": cursor}))
+    await scenario("list_by_character", lambda i: client.get(
+        "/api/guides/", params={"limit": 20, "character_id": rng.randint(1, characters)}))
+    await scenario("list_by_vision", lambda i: client.get(
+        "/api/guides/", params={"limit": 20, "vision": rng.choice(VISIONS)}))
+    await scenario("detail", lambda i: client.get(f"/api/guides/{rng.choice(approved_ids)}"))
+    await scenario("search", lambda i: client.get(
+        "/api/search/", params={"q": rng.choice(WORDS), "limit": 20}))
+    await scenario("pending", lambda i: client.get("/api/guides/pending", params={"limit": 20}))
+
+    # The same mix of list and detail reads, alone and then with writers
+    # creating and approving guides, which invalidates the response cache
+    # and contends for the SQLite write lock
+    def read_mix(i):
+        if i % 2:
+            return client.get(f"/api/guides/{rng.choice(approved_ids)}")
+        return client.get("/api/guides/", params={"limit": 20, "character_id": rng.randint(1, characters)})
+
+    await scenario("reads_alone", read_mix)
+    if writers:
+        stop = asyncio.Event()
+        writing = asyncio.create_task(run_writers(client, writers, stop, seed, characters))
+        try:
+            await scenario("reads_during_writes", read_mix)
+        finally:
+            stop.set()
+            results["reads_during_writes"]["writes"] = await writing
+        alone, during = results["reads_alone"], results["reads_during_writes"]
+        during["rps_vs_alone"] = round(during["rps"] / alone["rps"], 3) if alone["rps"] else None
+        log(f"   with {writers} writers: {during['writes']['requests']} writes, "
+              f"{during['writes']['locked_errors'] + during['locked_errors']} 'database is locked' errors")
+
+    created = []
+
+    async def create(i):
+        response = await client.post(
+            "/api/guides/",
+            data={
+                "username": "benchmark",
+                "character_name": f"Character {rng.randint(1, characters)}",
+                "title": f"Benchmark guide {i}",
+                "description": "Created by the benchmark suite to time uploads.",
+            },
+            files={"picture": (f"bench{i}.png", png_bytes(seed * requests + i), "image/png")},
+        )
+        if response.status_code < 400:
+            created.append(response.json()["id"])
+        return response
+
+    await scenario("create_with_upload", create)
+
+    # Moderation works through the guides created above, so it never runs dry
+    to_approve, to_reject = created[0::3], created[1::3]
+    to_bulk = created[2::3]
+    if to_approve:
+        await scenario("approve", lambda i: client.patch(f"/api/guides/{to_approve[i]}/approve"),
+                       count=len(to_approve))
+    if to_reject:
+        await scenario("reject", lambda i: client.delete(f"/api/guides/{to_reject[i]}"),
+                       count=len(to_reject))
+    if to_bulk:
+        batches = [to_bulk[i:i + 10] for i in range(0, len(to_bulk), 10)]
+        await scenario("bulk_moderate", lambda i: client.post("/api/guides/bulk", json={"actions": [
+            {"id": guide_id, "action": "approve" if n % 2 else "reject"}
+            for n, guide_id in enumerate(batches[i])
+        ]}), count=len(batches))
+
+    return results
+
+
+async def run_in_process(args):
+    import httpx
+    from app.main import app
+
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await run_suite(
+                client, args.requests, args.concurrency, args.seed, args.characters, args.writers
+            )
+    finally:
+        await app.router.shutdown()
+
+
+async def run_against_url(args):
+    import httpx
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        return await run_suite(
+            client, args.requests, args.concurrency, args.seed, args.characters, args.writers
+        )
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Scenarios whose p95 or throughput got worse than ``tolerance`` allows"""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        if before.get("p95_ms") and current["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {current['p95_ms']}ms")
+        if before.get("rps") and current["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {before['rps']} -> {current['rps']} req/s")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the build guide API")
+    parser.add_argument("--guides", type=int, default=10_000, help="synthetic guides to seed")
+    parser.add_argument("--characters", type=int, default=100, help="synthetic characters to seed")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10, help="requests in flight at once")
+    parser.add_argument("--writers", type=int, default=2,
+                        help="writers running during reads_during_writes; 0 skips it (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for data and requests")
+    parser.add_argument("--workdir", default=DEFAULT_WORKDIR,
+                        help="where the benchmark database and uploads live (default: %(default)s)")
+    parser.add_argument("--url", help="benchmark a running server instead of the app in-process "
+                                      "(its database must already be seeded)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report to compare against; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown against the baseline (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        scenarios = asyncio.run(run_against_url(args))
+    else:
+        workdir = os.path.abspath(args.workdir)
+        os.makedirs(workdir, exist_ok=True)
+        configure_environment(workdir)
+        prepare_database(workdir, args.guides, args.characters, args.seed)
+        scenarios = asyncio.run(run_in_process(args))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "target": args.url or "in-process",
+            "guides": args.guides,
+            "characters": args.characters,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "writers": args.writers,
+            "seed": args.seed,
+        },
+        "scenarios": scenarios,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        log(f" Report written to {args.output}")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            log(" Regressions against baseline:")
+            for line in regressions:
+                log(f"   {line}")
+            return 1
+        log(" No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
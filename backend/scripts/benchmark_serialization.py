@@ -0,0 +1,159 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_WORKDIR = os.path.join(BACKEND_DIR, ".bench")
+
+# Add parent directory to path so we can import from app
+sys.path.append(BACKEND_DIR)
+
+# Run as a script, so the scripts directory is already on the path
+from benchmark_api import configure_environment, prepare_database
+
+SLIM_FIELDS = "title,character_name,created_at"
+
+
+async def legacy_page(db, limit):
+    """The old path: ORM objects, a hand-built Pydantic model per guide,
+    ``jsonable_encoder`` and the stdlib encoder."""
+    from fastapi.encoders import jsonable_encoder
+    from sqlalchemy import select
+    from sqlalchemy.orm import joinedload, selectinload
+    from app.models import BuildGuide, Character
+    from app.schemas.build_guide import BuildGuideResponse
+
+    started = time.perf_counter()
+    guides = (await db.scalars(
+        select(BuildGuide)
+        .options(
+            joinedload(BuildGuide.character).load_only(Character.name),
+            selectinload(BuildGuide.uploads),
+        )
+        .where(BuildGuide.status == "approved")
+        .order_by(BuildGuide.created_at.desc(), BuildGuide.id.desc())
+        .limit(limit)
+    )).all()
+    responses = [
+        BuildGuideResponse(
+            id=g.id,
+            username=g.username,
+            character_id=g.character_id,
+            character_name=g.character.name if g.character else "Unknown",
+            title=g.title,
+            description=g.description,
+            picture_path=g.picture_path,
+            picture_variants=g.picture_variants,
+            created_at=g.created_at.isoformat(),
+            updated_at=g.updated_at.isoformat() if g.updated_at else None,
+            status=g.status,
+            uploads=[
+                {
+                    "id": u.id,
+                    "image_path": u.image_path,
+                    "image_variants": u.image_variants,
+                    "caption": u.caption,
+                    "uploaded_at": u.uploaded_at.isoformat(),
+                }
+                for u in g.uploads
+            ],
+        )
+        for g in guides
+    ]
+    built = time.perf_counter()
+    body = json.dumps(jsonable_encoder(responses)).encode()
+    return built - started, time.perf_counter() - built, len(responses), len(body)
+
+
+async def rows_page(db, limit, fields=None):
+    """The current path: Core rows to dicts to orjson"""
+    from app.models import BuildGuide
+    from app.services.guides import GUIDE_FIELDS, guide_select, render_rows
+    from app.services.serialization import dumps, parse_fields
+
+    projection = parse_fields(fields, GUIDE_FIELDS)
+    started = time.perf_counter()
+    rows = (await db.execute(
+        guide_select(projection)
+        .where(BuildGuide.status == "approved")
+        .order_by(BuildGuide.created_at.desc(), BuildGuide.id.desc())
+        .limit(limit)
+    )).all()
+    guides = await render_rows(db, rows, projection)
+    built = time.perf_counter()
+    body = dumps(guides)
+    return built - started, time.perf_counter() - built, len(guides), len(body)
+
+
+async def measure(page, limit, rounds, **kwargs):
+    """Median microseconds per guide over ``rounds`` runs, after one warm-up run"""
+    from app.database import AsyncSessionLocal
+
+    builds, encodes = [], []
+    for attempt in range(rounds + 1):
+        async with AsyncSessionLocal() as db:
+            build, encode, count, size = await page(db, limit, **kwargs)
+        if attempt:
+            builds.append(build / count * 1e6)
+            encodes.append(encode / count * 1e6)
+    build = statistics.median(builds)
+    encode = statistics.median(encodes)
+    return {
+        "guides": count,
+        "build_us_per_guide": round(build, 2),
+        "encode_us_per_guide": round(encode, 2),
+        "total_us_per_guide": round(build + encode, 2),
+        "bytes_per_guide": round(size / count),
+    }
+
+
+async def run(limit, rounds):
+    import app.main  # noqa: F401 - creates the tables and triggers
+    from app.database import async_engine, async_read_engine
+
+    try:
+        return {
+            "orm_pydantic_json": await measure(legacy_page, limit, rounds),
+            "rows_orjson": await measure(rows_page, limit, rounds),
+            f"rows_orjson_fields={SLIM_FIELDS}": await measure(rows_page, limit, rounds, fields=SLIM_FIELDS),
+        }
+    finally:
+        # aiosqlite connection threads would otherwise keep the process alive
+        for engine in (async_engine, async_read_engine):
+            await engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time guide serialization, old path against new")
+    parser.add_argument("--guides", type=int, default=10_000, help="synthetic guides to seed")
+    parser.add_argument("--characters", type=int, default=100, help="synthetic characters to seed")
+    parser.add_argument("--page", type=int, default=1000, help="guides rendered per run")
+    parser.add_argument("--rounds", type=int, default=10, help="timed runs per path")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the data")
+    parser.add_argument("--workdir", default=DEFAULT_WORKDIR,
+                        help="where the benchmark database lives (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    workdir = os.path.abspath(args.workdir)
+    os.makedirs(workdir, exist_ok=True)
+    configure_environment(workdir)
+    prepare_database(workdir, args.guides, args.characters, args.seed)
+    results = asyncio.run(run(args.page, args.rounds))
+
+    print(f" {'path':<50} {'build':>8} {'encode':>8} {'total':>8} {'bytes':>7}")
+    for name, r in results.items():
+        print(f" {name:<50} {r['build_us_per_guide']:>8} {r['encode_us_per_guide']:>8} "
+              f"{r['total_us_per_guide']:>8} {r['bytes_per_guide']:>7}")
+    print(" (microseconds per guide; build covers the queries and Python objects)")
+    baseline = results["orm_pydantic_json"]["total_us_per_guide"]
+    for name, r in list(results.items())[1:]:
+        print(f" {name}: {baseline / r['total_us_per_guide']:.1f}x faster than orm_pydantic_json")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add parent directory to path so we can import from app
+sys.path.append(BACKEND_DIR)
+
+VISIONS = ["Anemo", "Cryo", "Dendro", "Electro", "Geo", "Hydro", "Pyro"]
+WEAPONS = ["Bow", "Catalyst", "Claymore", "Polearm", "Sword"]
+WORDS = (
+    "crit damage energy recharge burst skill reaction team support main dps sub artifact set "
+    "weapon talent rotation vaporize melt freeze shield heal elemental mastery stacks uptime "
+    "attack defense hp bonus passive constellation refinement substat priority swirl bloom "
+    "overload quicken aggravate spread hyperbloom burgeon charged plunge normal combo"
+).split()
+TITLE_TEMPLATES = [
+    "{name} {a} Build",
+    "Best {name} {a} {b} Guide",
+    "{name}: {a} and {b} Team",
+    "F2P {name} {a} Setup",
+    "{name} {a} {b} Rotation Guide",
+]
+FIXTURE_PICS = "build_pics/fixtures"
+FIXTURE_CHARACTERS = "character-{}"
+
+
+def zipf_weights(count, skew):
+    """Cumulative weights where item ``n`` is ``1 / n**skew`` as likely as the first"""
+    return list(accumulate(1 / (rank ** skew) for rank in range(1, count + 1)))
+
+
+def sentence(rng, words):
+    return " ".join(rng.choices(WORDS, k=words)).capitalize() + "."
+
+
+def description(rng):
+    """A few sentences, with a long tail of much longer write-ups"""
+    sentences = min(int(rng.paretovariate(1.5) * 3), 60)
+    return " ".join(sentence(rng, rng.randint(6, 18)) for _ in range(sentences))[:5000]
+
+
+def write_placeholder_images(static_dir, count, seed):
+    """Write ``count`` small distinct PNGs and return their static-relative paths"""
+    from PIL import Image
+
+    rng = random.Random(seed)
+    directory = os.path.join(static_dir, *FIXTURE_PICS.split("/"))
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = f"{FIXTURE_PICS}/fixture_{i}.png"
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        Image.new("RGB", (320, 180), color).save(os.path.join(static_dir, *path.split("/")))
+        paths.append(path)
+    return paths
+
+
+def ensure_characters(conn, count, rng):
+    """Ids and names of the characters to attach guides to.
+
+    Uses whatever ``seed_characters.py`` stored; only when the table is
+    empty are ``count`` synthetic characters inserted.
+    """
+    from sqlalchemy import insert, select
+    from app.models import Character
+
+    rows = conn.execute(select(Character.id, Character.name).order_by(Character.id)).all()
+    if rows:
+        return rows, False
+    conn.execute(insert(Character), [
+        {
+            "key": FIXTURE_CHARACTERS.format(i),
+            "name": f"Character {i}",
+            "title": "Fixture",
+            "vision": rng.choice(VISIONS),
+            "weapon": rng.choice(WEAPONS),
+            "rarity": rng.choice([4, 5]),
+            "description": "Synthetic character",
+        }
+        for i in range(1, count + 1)
+    ])
+    return conn.execute(select(Character.id, Character.name).order_by(Character.id)).all(), True
+
+
+def _drop_write_overhead(conn):
+    """Drop triggers and secondary indexes that would be maintained row by row.
+
+    The guides' FTS table goes too, so ``install_search_index`` recreates it
+    and fills it with a single 'rebuild' once loading is done.
+    """
+    from sqlalchemy import text
+    from app.models import BuildGuide, Upload
+    from app.services.character_stats import TRIGGERS as CHARACTER_STATS_TRIGGERS
+    from app.services.table_versions import TRACKED_TABLES
+
+    for table in TRACKED_TABLES:
+        for event in ("insert", "update", "delete"):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {table}_version_{event}"))
+    for suffix in ("ai", "ad", "au"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS build_guides_fts_{suffix}"))
+    for trigger in CHARACTER_STATS_TRIGGERS:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    conn.execute(text("DROP TABLE IF EXISTS build_guides_fts"))
+    for table in (BuildGuide.__table__, Upload.__table__):
+        for index in table.indexes:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+
+def _restore_write_overhead(engine):
+    from sqlalchemy import text
+    from app.models import BuildGuide, Upload
+    from app.services.character_stats import install_character_stats
+    from app.services.search import install_search_index
+    from app.services.table_versions import TRACKED_TABLES, install_change_counters
+
+    with engine.begin() as conn:
+        for table in (BuildGuide.__table__, Upload.__table__):
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+    install_search_index(engine)
+    install_change_counters(engine)
+    # Recreating the stats triggers recomputes the stats in one pass
+    install_character_stats(engine)
+    # The triggers were off while loading; count the load as one change
+    with engine.begin() as conn:
+        for table in TRACKED_TABLES:
+            conn.execute(text(
+                "UPDATE table_versions SET version = version + 1, "
+                "updated_at = CURRENT_TIMESTAMP WHERE name = :name"
+            ), {"name": table})
+        conn.execute(text("ANALYZE"))
+
+
+def generate(guides, uploads_per_guide=1.0, characters=100, users=5000, skew=1.1,
+             pending_ratio=0.15, days=730, images=0, seed=42, batch_size=10_000,
+             replace=False, log=print):
+    """Bulk insert synthetic guides and uploads into the configured database.
+
+    Character popularity and user activity both follow a Zipf distribution,
+    guide creation speeds up over the ``days`` covered, and the same ``seed``
+    always produces the same rows.
+    """
+    from sqlalchemy import delete, func, insert, select
+    import app.main  # noqa: F401 - creates the tables, search index and triggers
+    from app.config import settings
+    from app.database import engine
+    from app.models import BuildGuide, Upload
+    from app.services.character_cache import bump_catalog_version
+
+    rng = random.Random(seed)
+    pictures = write_placeholder_images(settings.STATIC_DIR, images, seed) if images else []
+    default_picture = "build_pics/default.jpg"
+    now = datetime.utcnow()
+    span = days * 86400
+    started = time.perf_counter()
+
+    with engine.begin() as conn:
+        character_rows, created_characters = ensure_characters(conn, characters, rng)
+        if replace:
+            conn.execute(delete(Upload))
+            conn.execute(delete(BuildGuide))
+        next_guide = (conn.scalar(select(func.max(BuildGuide.id))) or 0) + 1
+
+    # Popular characters are picked at random, not by id order
+    popularity = list(character_rows)
+    rng.shuffle(popularity)
+    character_weights = zipf_weights(len(popularity), skew)
+    user_weights = zipf_weights(users, skew)
+    usernames = [f"traveler{n}" for n in range(users)]
+
+    inserted_uploads = 0
+    with engine.connect() as conn:
+        # Fixtures are disposable, so durability can wait until the end
+        conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        _drop_write_overhead(conn)
+        conn.commit()
+        try:
+            for start in range(0, guides, batch_size):
+                count = min(batch_size, guides - start)
+                picks = rng.choices(popularity, cum_weights=character_weights, k=count)
+                authors = rng.choices(usernames, cum_weights=user_weights, k=count)
+                guide_rows, upload_rows = [], []
+                for offset, (character, username) in enumerate(zip(picks, authors)):
+                    guide_id = next_guide + start + offset
+                    # sqrt skews creation times towards the recent end of the span
+                    created_at = now - timedelta(seconds=span * (1 - rng.random() ** 0.5))
+                    a, b = rng.sample(WORDS, 2)
+                    guide_rows.append({
+                        "id": guide_id,
+                        "username": username,
+                        "character_id": character.id,
+                        "title": rng.choice(TITLE_TEMPLATES).format(
+                            name=character.name, a=a.title(), b=b.title())[:100],
+                        "description": description(rng),
+                        "picture_path": rng.choice(pictures) if pictures else default_picture,
+                        "status": "pending" if rng.random() < pending_ratio else "approved",
+                        "created_at": created_at,
+                        "updated_at": created_at,
+                    })
+                    for _ in range(int(rng.expovariate(1 / uploads_per_guide)) if uploads_per_guide else 0):
+                        upload_rows.append({
+                            "build_guide_id": guide_id,
+                            "image_path": rng.choice(pictures) if pictures else default_picture,
+                            "caption": sentence(rng, rng.randint(3, 10))[:200],
+                            "uploaded_at": created_at,
+                        })
+                conn.execute(insert(BuildGuide), guide_rows)
+                if upload_rows:
+                    conn.execute(insert(Upload), upload_rows)
+                conn.commit()
+                inserted_uploads += len(upload_rows)
+                done = start + count
+                rate = done / (time.perf_counter() - started)
+                log(f" Inserted {done}/{guides} guides ({rate:,.0f}/s)")
+        finally:
+            # Leave a usable database behind even if loading stopped halfway
+            conn.rollback()
+            conn.exec_driver_sql(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+            log(" Rebuilding indexes and search index...")
+            _restore_write_overhead(engine)
+
+    if created_characters:
+        bump_catalog_version()
+    log(f" Generated {guides} guides and {inserted_uploads} uploads "
+        f"in {time.perf_counter() - started:.1f}s")
+    return inserted_uploads
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Bulk generate synthetic build guides and uploads for load testing"
+    )
+    parser.add_argument("--guides", type=int, default=100_000, help="guides to create")
+    parser.add_argument("--uploads-per-guide", type=float, default=1.0,
+                        help="average extra images per guide (default: %(default)s)")
+    parser.add_argument("--characters", type=int, default=100,
+                        help="synthetic characters to create if the table is empty")
+    parser.add_argument("--users", type=int, default=5000, help="distinct usernames")
+    parser.add_argument("--skew", type=float, default=1.1,
+                        help="Zipf exponent for character and user popularity (default: %(default)s)")
+    parser.add_argument("--pending-ratio", type=float, default=0.15,
+                        help="share of guides left pending (default: %(default)s)")
+    parser.add_argument("--days", type=int, default=730, help="how far back guides are dated")
+    parser.add_argument("--images", type=int, default=0,
+                        help="write this many placeholder PNGs and reference them "
+                             "(default: every row points at default.jpg)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--database", help="SQLite file to fill instead of the app's database")
+    parser.add_argument("--replace", action="store_true",
+                        help="delete existing guides and uploads first")
+    args = parser.parse_args(argv)
+
+    if args.database:
+        # Settings are read on import, so this has to happen before app is loaded
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.database)}"
+    os.chdir(BACKEND_DIR)
+
+    generate(
+        args.guides, uploads_per_guide=args.uploads_per_guide, characters=args.characters,
+        users=args.users, skew=args.skew, pending_ratio=args.pending_ratio, days=args.days,
+        images=args.images, seed=args.seed, batch_size=args.batch_size, replace=args.replace,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+import argparse
+import os
+import sys
+
+# Add parent directory to path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.services.reconciler import Reconciler
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Find uploaded images no build guide or upload row references"
+    )
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--delete", action="store_true", help="Delete orphaned files")
+    action.add_argument("--quarantine", action="store_true",
+                        help="Move orphaned files into --quarantine-dir")
+    parser.add_argument("--quarantine-dir", default=settings.QUARANTINE_DIR)
+    parser.add_argument("--min-age", type=float, default=settings.RECONCILE_MIN_AGE_SECONDS,
+                        help="Skip files modified in the last N seconds (default: %(default)s)")
+    parser.add_argument("--rate", type=float, default=settings.RECONCILE_RATE,
+                        help="Maximum files removed per second, 0 for no limit (default: %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--keep", action="append", default=list(settings.RECONCILE_KEEP),
+                        help="Path relative to the static directory that is never removed")
+    parser.add_argument("-v", "--verbose", action="store_true", help="List every orphan")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    mode = "delete" if args.delete else "quarantine" if args.quarantine else "dry-run"
+
+    report = Reconciler(
+        mode=mode,
+        batch_size=args.batch_size,
+        min_age=args.min_age,
+        rate=args.rate or None,
+        quarantine_dir=args.quarantine_dir,
+        keep=tuple(args.keep),
+    ).run()
+
+    if args.verbose or mode == "dry-run":
+        for path in report.orphans:
+            print(f"  {path}")
+    print(f"\nScanned {report.scanned} files: {report.referenced} referenced, "
+          f"{report.skipped} skipped, {len(report.orphans)} orphaned")
+    if mode == "dry-run":
+        print("Dry run - nothing was changed. Pass --delete or --quarantine to act.")
+    elif report.failed:
+        print(f"{len(report.failed)} files could not be removed")
+        return 1
+    else:
+        print(f"{len(report.orphans)} orphans handled ({mode})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
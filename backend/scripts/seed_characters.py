@@ -1,16 +1,162 @@
-import requests
-import sys
+import argparse
+import json
 import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import requests
 
 # Add parent directory to path so we can import from app
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from sqlalchemy.dialects.sqlite import insert
+
 from app.database import SessionLocal, Base, engine
 from app.models import Character  # Import all models
-from datetime import datetime
-
-
-def seed_characters():
+from app.services.character_cache import bump_catalog_version
+
+API_URL = "https://genshin.jmp.blue"
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".seed_cache")
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+UPSERT_BATCH = 500
+
+
+class FetchError(Exception):
+    pass
+
+
+class CharacterFetcher:
+    """Fetch character JSON with retries and an on-disk response cache.
+
+    Every successful response is written to ``cache_dir`` (``index.json``
+    for the key list, ``<key>.json`` per character), so a re-run only
+    requests what is missing. With ``offline`` set the cache is the only
+    source, which also lets a fixture directory stand in for the API.
+    """
+
+    def __init__(self, base_url, cache_dir, offline=False, refresh=False,
+                 retries=4, backoff=0.5, timeout=10):
+        self.base_url = base_url.rstrip("/")
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.refresh = refresh
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._local = threading.local()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _session(self):
+        # One keep-alive session per worker thread
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _cache_path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def _get(self, path):
+        url = f"{self.base_url}{path}"
+        for attempt in range(self.retries + 1):
+            try:
+                response = self._session().get(url, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+                error = f"HTTP {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+            except (requests.HTTPError, ValueError) as e:
+                raise FetchError(f"{url}: {e}")
+            if attempt < self.retries:
+                time.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+        raise FetchError(f"{url}: {error} after {self.retries + 1} attempts")
+
+    def fetch(self, name, path):
+        cache_path = self._cache_path(name)
+        if os.path.exists(cache_path) and (self.offline or not self.refresh):
+            with open(cache_path) as f:
+                return json.load(f)
+        if self.offline:
+            raise FetchError(f"{name} is not in {self.cache_dir}")
+
+        data = self._get(path)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, cache_path)
+        return data
+
+    def character_keys(self):
+        return self.fetch("index", "/characters")
+
+    def character(self, key):
+        return self.fetch(key, f"/characters/{key}")
+
+
+def character_row(key, char_data):
+    """Map one API response onto Character columns"""
+    # Parse release date if available
+    release_date = None
+    release_str = char_data.get('release')
+    if release_str:
+        try:
+            release_date = datetime.strptime(release_str, '%Y-%m-%d').date()
+        except ValueError:
+            pass
+
+    return {
+        "key": key,
+        "name": char_data.get('name'),
+        "title": char_data.get('title'),
+        "vision": char_data.get('vision'),
+        "weapon": char_data.get('weapon'),
+        "gender": char_data.get('gender'),
+        "nation": char_data.get('nation'),
+        "affiliation": char_data.get('affiliation'),
+        "rarity": char_data.get('rarity'),
+        "release": release_date,
+        "constellation": char_data.get('constellation'),
+        # Birthday format: "0000-MM-DD"
+        "birthday": char_data.get('birthday', '0000-01-01'),
+        "description": char_data.get('description'),
+    }
+
+
+def fetch_all(fetcher, keys, workers):
+    """Fetch every character concurrently; returns (rows, failed keys)"""
+    rows, failed = [], []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetcher.character, key): key for key in keys}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                rows.append(character_row(key, future.result()))
+            except FetchError as e:
+                print(f"     Error fetching {key}: {e}")
+                failed.append(key)
+    rows.sort(key=lambda r: r["key"])
+    return rows, failed
+
+
+def upsert_characters(db, rows):
+    """Insert or update characters by ``key`` in one transaction"""
+    for start in range(0, len(rows), UPSERT_BATCH):
+        stmt = insert(Character).values(rows[start:start + UPSERT_BATCH])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Character.key],
+            set_={col: stmt.excluded[col] for col in rows[0] if col != "key"},
+        )
+        db.execute(stmt)
+    db.commit()
+
+
+def seed_characters(base_url=API_URL, cache_dir=DEFAULT_CACHE_DIR, workers=8,
+                    offline=False, refresh=False):
     """Fetch characters from Genshin API and seed database"""
 
     # Create all tables
@@ -18,86 +164,45 @@ def seed_characters():
     Base.metadata.create_all(bind=engine)
     print(" Database tables created")
 
-    db = SessionLocal()
+    fetcher = CharacterFetcher(base_url, cache_dir, offline=offline, refresh=refresh)
 
+    print(" Fetching characters from Genshin API...")
     try:
-        # Check if characters already exist
-        existing_count = db.query(Character).count()
-        if existing_count > 0:
-            print(f" Characters already seeded ({existing_count} characters found)")
-            response = input("Delete and re-seed? (yes/no): ")
-            if response.lower() != 'yes':
-                print("Aborting seed.")
-                return
-            # Delete existing characters
-            db.query(Character).delete()
-            db.commit()
-            print(" Deleted existing characters")
-
-        print(" Fetching characters from Genshin API...")
-
-        # Fetch character list
-        response = requests.get('https://genshin.jmp.blue/characters')
-        character_keys = response.json()
-
-        print(f" Found {len(character_keys)} characters")
-
-        characters_added = 0
-
-        # Fetch each character's details
-        for key in character_keys:
-            try:
-                print(f"   Fetching {key}...")
-                char_response = requests.get(f'https://genshin.jmp.blue/characters/{key}')
-                char_data = char_response.json()
-
-                # Parse birthday (format: "0000-MM-DD")
-                birthday_str = char_data.get('birthday', '0000-01-01')
-
-                # Parse release date if available
-                release_str = char_data.get('release')
-                release_date = None
-                if release_str:
-                    try:
-                        release_date = datetime.strptime(release_str, '%Y-%m-%d').date()
-                    except:
-                        pass
-
-                # Create character
-                character = Character(
-                    key=key,
-                    name=char_data.get('name'),
-                    title=char_data.get('title'),
-                    vision=char_data.get('vision'),
-                    weapon=char_data.get('weapon'),
-                    gender=char_data.get('gender'),
-                    nation=char_data.get('nation'),
-                    affiliation=char_data.get('affiliation'),
-                    rarity=char_data.get('rarity'),
-                    release=release_date,
-                    constellation=char_data.get('constellation'),
-                    birthday=birthday_str,
-                    description=char_data.get('description')
-                )
-
-                db.add(character)
-                characters_added += 1
-
-            except Exception as e:
-                print(f"     Error fetching {key}: {str(e)}")
-                continue
-
-        db.commit()
-        print(f"\n Successfully seeded {characters_added} characters!")
+        character_keys = fetcher.character_keys()
+    except FetchError as e:
+        print(f"\n Error: {e}")
+        return 1
+    print(f" Found {len(character_keys)} characters")
 
+    rows, failed = fetch_all(fetcher, character_keys, workers)
+
+    db = SessionLocal()
+    try:
+        if rows:
+            upsert_characters(db, rows)
+            bump_catalog_version()
+        print(f"\n Successfully seeded {len(rows)} characters!")
     except Exception as e:
         print(f"\n Error: {str(e)}")
         import traceback
         traceback.print_exc()
         db.rollback()
+        return 1
     finally:
         db.close()
 
+    if failed:
+        print(f" {len(failed)} characters failed; run again to retry just those: {', '.join(sorted(failed))}")
+        return 1
+    return 0
+
 
 if __name__ == "__main__":
-    seed_characters()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Seed the characters table from the Genshin API")
+    parser.add_argument("--base-url", default=API_URL, help="API root (point at a local stub for offline runs)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="where API responses are cached")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent requests")
+    parser.add_argument("--offline", action="store_true", help="only read the cache or fixture directory")
+    parser.add_argument("--refresh", action="store_true", help="ignore cached responses and refetch")
+    args = parser.parse_args()
+    sys.exit(seed_characters(args.base_url, args.cache_dir, args.workers, args.offline, args.refresh))
@@ -0,0 +1,137 @@
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix="genshin-tests-")
+
+# Settings are read once, when app is first imported, so the throwaway
+# database and directories have to be in place before that
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(WORKDIR, 'test.db')}",
+    "STATIC_DIR": os.path.join(WORKDIR, "static"),
+    "UPLOAD_DIR": os.path.join(WORKDIR, "uploads"),
+    "QUARANTINE_DIR": os.path.join(WORKDIR, "quarantine"),
+    "CHARACTER_CATALOG_STAMP": os.path.join(WORKDIR, "character_catalog.version"),
+    "RECONCILE_INTERVAL_SECONDS": "0",
+    "CHARACTER_STATS_RECONCILE_SECONDS": "0",
+    "IMAGE_WORKERS": "1",
+})
+# The app mounts app/static relative to the working directory
+os.chdir(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+CHARACTERS = [
+    {"key": "albedo", "name": "Albedo", "vision": "Geo", "weapon": "Sword"},
+    {"key": "amber", "name": "Amber", "vision": "Pyro", "weapon": "Bow"},
+    {"key": "hu-tao", "name": "Hu Tao", "vision": "Pyro", "weapon": "Polearm"},
+    {"key": "raiden", "name": "Raiden Shogun", "vision": "Electro", "weapon": "Polearm"},
+    {"key": "xiao", "name": "Xiao", "vision": "Anemo", "weapon": "Polearm"},
+]
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.database import SessionLocal
+    from app.main import app
+    from app.models import Character
+    from app.services.character_cache import bump_catalog_version
+
+    with SessionLocal() as db:
+        db.add_all(Character(title="", description="", **c) for c in CHARACTERS)
+        db.commit()
+    bump_catalog_version()
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(autouse=True)
+def clean_state(client, monkeypatch):
+    """Start every test with no guides or files and empty caches and buckets"""
+    from app.config import settings
+    from app.database import SessionLocal
+    from app.models import BuildGuide, StoredFile, Upload
+    from app.services import rate_limit
+    from app.services.response_cache import MemoryBackend, response_cache
+
+    with SessionLocal() as db:
+        for model in (Upload, BuildGuide, StoredFile):
+            db.query(model).delete()
+        db.commit()
+    shutil.rmtree(os.path.join(settings.STATIC_DIR, "build_pics", "cas"), ignore_errors=True)
+    os.makedirs(os.path.join(settings.STATIC_DIR, "build_pics", "cas"))
+
+    monkeypatch.setattr(response_cache, "backend", MemoryBackend(settings.RESPONSE_CACHE_MAX_ENTRIES))
+    monkeypatch.setattr(response_cache, "hits", 0)
+    monkeypatch.setattr(response_cache, "misses", 0)
+    buckets = rate_limit.MemoryBuckets(settings.RATE_LIMIT_MAX_CLIENTS)
+    monkeypatch.setattr(rate_limit.rate_limiter, "backend", buckets)
+    monkeypatch.setattr(rate_limit.login_limiter, "backend", buckets)
+
+
+@pytest.fixture
+def run(client):
+    """Run a coroutine function on the app's event loop"""
+    return lambda fn, *args: client.portal.call(fn, *args)
+
+
+def png_bytes(seed=0, size=(64, 48)):
+    """A PNG whose bytes differ per ``seed``"""
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.new("RGB", size, (seed % 256, seed // 256 % 256, 90)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def post_guide(client, picture=None, **fields):
+    """Create a guide through the API; ``picture`` is PNG bytes"""
+    form = {
+        "username": "tester",
+        "character_name": "Albedo",
+        "title": "Test guide",
+        "description": "A description long enough to pass",
+    }
+    form.update(fields)
+    files = {"picture": ("picture.png", io.BytesIO(picture), "image/png")} if picture else None
+    return client.post("/api/guides/", data=form, files=files)
+
+
+def add_guides(count, status="approved", uploads=0, character_id=1):
+    """Insert guides straight into the database; returns their ids"""
+    from app.database import SessionLocal
+    from app.models import BuildGuide, Upload
+
+    with SessionLocal() as db:
+        guides = [
+            BuildGuide(
+                username=f"user{i}",
+                character_id=character_id,
+                title=f"Guide {i}",
+                description="A description long enough to pass",
+                status=status,
+            )
+            for i in range(count)
+        ]
+        db.add_all(guides)
+        db.flush()
+        db.add_all(
+            Upload(build_guide_id=g.id, image_path=f"build_pics/upload_{g.id}_{n}.png", caption="A caption")
+            for g in guides
+            for n in range(uploads)
+        )
+        db.commit()
+        return [g.id for g in guides]
+
+
+def approve(client, guide_id):
+    response = client.patch(f"/api/guides/{guide_id}/approve")
+    assert response.status_code == 200
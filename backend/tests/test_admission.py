@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services.rate_limit import ConcurrencyGate, Overloaded
+
+from conftest import add_guides, post_guide
+
+
+def test_submissions_past_the_burst_get_429(client):
+    for _ in range(settings.RATE_LIMIT_BURST):
+        assert post_guide(client).status_code == 201
+    response = post_guide(client)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    # Reads are never limited
+    assert client.get("/api/guides/").status_code == 200
+
+
+def test_forwarded_for_is_ignored_by_default(client):
+    for _ in range(settings.RATE_LIMIT_BURST):
+        post_guide(client)
+    assert post_guide(client).status_code == 429
+    other = client.post(
+        "/api/guides/", data={"username": "x"}, headers={"X-Forwarded-For": "203.0.113.9"}
+    )
+    # Without TRUST_FORWARDED_FOR the header is ignored, so this client is still limited
+    assert other.status_code == 429
+
+
+def test_moderation_is_not_limited(client):
+    ids = add_guides(settings.RATE_LIMIT_BURST * 2, status="pending")
+    for guide_id in ids:
+        assert client.patch(f"/api/guides/{guide_id}/approve").status_code == 200
+    for _ in range(3):
+        response = client.post("/api/guides/bulk", json={"actions": [{"id": ids[0], "action": "reject"}]})
+        assert response.status_code == 200
+    # ...and does not spend the submitters' tokens
+    assert post_guide(client).status_code == 201
+
+
+def test_login_has_its_own_limit(client):
+    credentials = {"email": "nobody@example.com", "password": "wrong"}
+    for _ in range(settings.LOGIN_RATE_LIMIT_BURST):
+        assert client.post("/api/auth/login", json=credentials).status_code == 401
+    response = client.post("/api/auth/login", json=credentials)
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+    assert post_guide(client).status_code == 201
+
+
+def test_gate_rejects_when_the_queue_is_full():
+    async def scenario():
+        gate = ConcurrencyGate(limit=1, queue_size=1, timeout=5)
+        release = asyncio.Event()
+
+        async def hold():
+            async with gate.admit():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        assert (gate.active, gate.waiting) == (1, 1)
+        with pytest.raises(Overloaded):
+            async with gate.admit():
+                pass
+        release.set()
+        await asyncio.gather(holder, waiter)
+        assert (gate.active, gate.waiting) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_gate_rejects_after_the_timeout():
+    async def scenario():
+        gate = ConcurrencyGate(limit=1, queue_size=4, timeout=0.01)
+        async with gate.admit():
+            with pytest.raises(Overloaded):
+                async with gate.admit():
+                    pass
+        assert gate.waiting == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,77 @@
+import threading
+
+from sqlalchemy import text
+
+from app.database import engine
+from app.services.character_stats import reconcile_character_stats, reconcile_from_engine
+
+from conftest import add_guides
+
+
+def stats():
+    with engine.connect() as conn:
+        return {
+            row.character_id: (row.approved_count, row.pending_count, row.latest_guide_id)
+            for row in conn.execute(text("SELECT * FROM character_stats"))
+            if row.approved_count or row.pending_count or row.character_id > 5
+        }
+
+
+def corrupt(sql):
+    with engine.begin() as conn:
+        conn.execute(text(sql))
+
+
+def test_triggers_keep_the_stats(client):
+    reconcile_from_engine(engine)  # characters without guides get zero rows
+    approved = add_guides(2)
+    pending, = add_guides(1, status="pending", character_id=2)
+    assert stats() == {1: (2, 0, approved[-1]), 2: (0, 1, None)}
+
+    client.patch(f"/api/guides/{pending}/approve")
+    assert stats()[2] == (1, 0, pending)
+    with engine.begin() as conn:
+        assert reconcile_character_stats(conn) == 0
+
+
+def test_reconcile_repairs_drift(client):
+    reconcile_from_engine(engine)
+    first, second = add_guides(2)
+    corrupt("UPDATE character_stats SET approved_count = 7 WHERE character_id = 1")
+    corrupt("DELETE FROM character_stats WHERE character_id = 2")
+    corrupt("INSERT INTO character_stats (character_id, approved_count, pending_count) VALUES (999, 1, 0)")
+
+    assert reconcile_from_engine(engine) == 3
+    assert stats() == {1: (2, 0, second)}
+    assert reconcile_from_engine(engine) == 0
+
+
+def test_reconcile_does_not_undo_a_concurrent_approval(client):
+    """An approval committed while the reconcile runs must not be overwritten"""
+    reconcile_from_engine(engine)
+    guide_id, = add_guides(1, status="pending")
+    # Drift the reconcile will repair, so it writes character 1's row
+    corrupt("UPDATE character_stats SET pending_count = 5 WHERE character_id = 1")
+    locked, release = threading.Event(), threading.Event()
+
+    def approve_slowly():
+        with engine.connect() as conn:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            conn.execute(text("UPDATE build_guides SET status = 'approved' WHERE id = :id"), {"id": guide_id})
+            locked.set()
+            release.wait(5)
+            conn.exec_driver_sql("COMMIT")
+
+    approver = threading.Thread(target=approve_slowly)
+    approver.start()
+    assert locked.wait(5)
+    result = []
+    reconciler = threading.Thread(target=lambda: result.append(reconcile_from_engine(engine)))
+    reconciler.start()
+    reconciler.join(0.3)
+    release.set()
+    approver.join()
+    reconciler.join()
+
+    assert result == [1]
+    assert stats() == {1: (1, 0, guide_id)}
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import async_engine, async_read_engine, engine
+from app.main import app
+from app.services import rate_limit
+
+from conftest import add_guides, png_bytes
+
+WRITERS = 3
+READERS = 6
+READS_PER_READER = 40
+
+
+@pytest.fixture
+def unlimited(monkeypatch):
+    # Every request comes from one client; the limiter is tested elsewhere
+    monkeypatch.setattr(rate_limit.rate_limiter, "rate", 0)
+
+
+def test_connections_use_the_tuning_profile(client, run):
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == settings.SQLITE_BUSY_TIMEOUT_MS
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+
+    async def query_only():
+        async with async_read_engine.connect() as read_conn, async_engine.connect() as write_conn:
+            return (
+                (await read_conn.exec_driver_sql("PRAGMA query_only")).scalar(),
+                (await write_conn.exec_driver_sql("PRAGMA query_only")).scalar(),
+            )
+
+    assert run(query_only) == (1, 0)
+
+
+def test_reads_keep_working_during_concurrent_writes(client, run, unlimited):
+    guide_ids = add_guides(30, uploads=2)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            writing = asyncio.Event()
+            done = asyncio.Event()
+            reads, writes = [], []
+
+            async def writer(w):
+                n = 0
+                while not done.is_set():
+                    response = await http.post("/api/guides/", data={
+                        "username": f"writer{w}",
+                        "character_name": "Amber",
+                        "title": f"Concurrent guide {w}-{n}",
+                        "description": "Written while other requests are reading",
+                    }, files={"picture": ("p.png", png_bytes(w * 1000 + n), "image/png")})
+                    writes.append(response.status_code)
+                    if response.status_code == 201:
+                        approved = await http.patch(f"/api/guides/{response.json()['id']}/approve")
+                        writes.append(approved.status_code)
+                    writing.set()
+                    n += 1
+
+            async def reader(r):
+                await writing.wait()
+                for i in range(READS_PER_READER):
+                    if i % 2:
+                        url = f"/api/guides/{guide_ids[(r + i) % len(guide_ids)]}"
+                    else:
+                        url = "/api/guides/"
+                    reads.append((await http.get(url)).status_code)
+
+            writers = [asyncio.create_task(writer(w)) for w in range(WRITERS)]
+            await asyncio.gather(*(reader(r) for r in range(READERS)))
+            done.set()
+            await asyncio.gather(*writers)
+            return reads, writes
+
+    # Any "database is locked" would surface here as an OperationalError
+    reads, writes = run(scenario)
+    assert reads == [200] * READERS * READS_PER_READER
+    assert writes and set(writes) == {200, 201}
+
+
+def test_writers_wait_for_the_lock_instead_of_failing(client, unlimited):
+    """A write transaction held by another connection delays an API write but doesn't fail it"""
+    guide_id, = add_guides(1, status="pending")
+    locked, release = threading.Event(), threading.Event()
+
+    def hold_write_lock():
+        with engine.connect() as conn:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            conn.execute(text("UPDATE build_guides SET title = title WHERE id = :id"), {"id": guide_id})
+            locked.set()
+            release.wait(5)
+            conn.exec_driver_sql("COMMIT")
+
+    holder = threading.Thread(target=hold_write_lock)
+    holder.start()
+    try:
+        assert locked.wait(5)
+        # Readers aren't blocked by the open write transaction...
+        assert client.get(f"/api/guides/{guide_id}").status_code == 200
+        # ...and a writer waits for it, well within busy_timeout
+        threading.Timer(0.3, release.set).start()
+        assert client.patch(f"/api/guides/{guide_id}/approve").status_code == 200
+    finally:
+        release.set()
+        holder.join()
+    assert client.get(f"/api/guides/{guide_id}").json()["status"] == "approved"
@@ -0,0 +1,114 @@
+import io
+import os
+
+from starlette.datastructures import Headers, UploadFile
+
+from app.config import settings
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models import StoredFile
+from app.services import content_store
+
+from conftest import png_bytes, post_guide
+
+
+def on_disk(path):
+    return os.path.exists(os.path.join(settings.STATIC_DIR, path))
+
+
+def ref_counts():
+    with SessionLocal() as db:
+        return {f.path: f.ref_count for f in db.query(StoredFile)}
+
+
+def upload_file(data):
+    return UploadFile(io.BytesIO(data), filename="picture.png", headers=Headers({"content-type": "image/png"}))
+
+
+def test_identical_pictures_share_one_counted_blob(client):
+    picture = png_bytes(7)
+    first = post_guide(client, picture).json()
+    second = post_guide(client, picture).json()
+
+    path = first["picture_path"]
+    assert second["picture_path"] == path
+    assert path.startswith(content_store.CAS_PREFIX + "/")
+    assert ref_counts() == {path: 2}
+
+    assert client.delete(f"/api/guides/{first['id']}").status_code == 200
+    assert ref_counts() == {path: 1}
+    assert on_disk(path)
+
+    assert client.delete(f"/api/guides/{second['id']}").status_code == 200
+    assert ref_counts() == {}
+    assert not on_disk(path)
+
+
+def test_bulk_reject_releases_pictures_and_uploads(client):
+    picture = png_bytes(8)
+    guide = post_guide(client, picture).json()
+    upload = client.post(
+        f"/api/guides/{guide['id']}/uploads",
+        data={"captions": ["Same bytes again", "Other bytes"]},
+        files=[
+            ("images", ("a.png", io.BytesIO(picture), "image/png")),
+            ("images", ("b.png", io.BytesIO(png_bytes(9)), "image/png")),
+        ],
+    ).json()
+    assert ref_counts() == {guide["picture_path"]: 2, upload[1]["image_path"]: 1}
+
+    response = client.post("/api/guides/bulk", json={"actions": [{"id": guide["id"], "action": "reject"}]})
+    assert response.json()["results"][0]["result"] == "rejected"
+    assert ref_counts() == {}
+    assert not on_disk(guide["picture_path"])
+    assert not on_disk(upload[1]["image_path"])
+
+
+def test_purge_between_put_and_acquire_restores_the_blob(client, run):
+    picture = png_bytes(10)
+    guide = post_guide(client, picture).json()
+    path = guide["picture_path"]
+
+    async def race():
+        async with AsyncSessionLocal() as db:
+            released = await content_store.release(db, [path])
+            await db.commit()
+        # Same bytes arrive while the blob still exists...
+        blob = content_store.put(upload_file(picture))
+        assert not blob.created
+        # ...and the purge of the released blob runs before the reference is taken
+        await content_store.purge_unreferenced(released)
+        assert not on_disk(path)
+        async with AsyncSessionLocal() as db:
+            await content_store.acquire(db, blob)
+            await db.commit()
+        return blob
+
+    blob = run(race)
+    assert on_disk(path)
+    assert not os.path.exists(blob.spare_path)
+    assert ref_counts() == {path: 1}
+
+
+def test_purge_keeps_blobs_that_were_acquired_again(client, run):
+    picture = png_bytes(11)
+    path = post_guide(client, picture).json()["picture_path"]
+    post_guide(client, picture)
+
+    run(content_store.purge_unreferenced, [path])
+    assert on_disk(path)
+
+
+def test_failed_batch_leaves_no_files(client):
+    guide = post_guide(client).json()
+    response = client.post(
+        f"/api/guides/{guide['id']}/uploads",
+        data={"captions": ["A fine picture", "Not a picture"]},
+        files=[
+            ("images", ("a.png", io.BytesIO(png_bytes(12)), "image/png")),
+            ("images", ("b.txt", io.BytesIO(b"hello"), "text/plain")),
+        ],
+    )
+    assert response.status_code == 400
+    cas_root = os.path.join(settings.STATIC_DIR, *content_store.CAS_PREFIX.split("/"))
+    assert [files for _, _, files in os.walk(cas_root) if files] == []
+    assert ref_counts() == {}
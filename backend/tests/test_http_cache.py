@@ -0,0 +1,125 @@
+import io
+import re
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from sqlalchemy import text
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.database import engine
+from app.services.http_cache import not_modified, set_validators
+from app.services.table_versions import install_change_counters
+
+from conftest import add_guides, approve, png_bytes
+
+
+def revalidate(client, url, etag):
+    return client.get(url, headers={"If-None-Match": etag})
+
+
+def test_unchanged_guides_revalidate_with_304(client):
+    guide_id, = add_guides(1)
+    for url in ("/api/guides/", f"/api/guides/{guide_id}", "/api/characters/"):
+        first = client.get(url)
+        assert first.status_code == 200
+        assert revalidate(client, url, first.headers["ETag"]).status_code == 304
+
+
+def test_approving_changes_the_etags(client):
+    guide_id, = add_guides(1, status="pending")
+    list_etag = client.get("/api/guides/").headers["ETag"]
+    detail_etag = client.get(f"/api/guides/{guide_id}").headers["ETag"]
+
+    approve(client, guide_id)
+
+    listed = revalidate(client, "/api/guides/", list_etag)
+    assert listed.status_code == 200
+    assert [g["id"] for g in listed.json()] == [guide_id]
+    detail = revalidate(client, f"/api/guides/{guide_id}", detail_etag)
+    assert detail.status_code == 200
+    assert detail.json()["status"] == "approved"
+
+
+def request_with(**headers):
+    raw = [(k.replace("_", "-").lower().encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": raw})
+
+
+def test_writes_are_timed_to_the_millisecond(client):
+    guide_id, = add_guides(1, status="pending")
+    approve(client, guide_id)
+    with engine.connect() as conn:
+        updated_at = conn.execute(text("SELECT updated_at FROM table_versions WHERE name = 'build_guides'")).scalar()
+    assert re.fullmatch(r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\.\d{3}", updated_at)
+
+
+def test_old_second_resolution_triggers_are_replaced(client):
+    with engine.begin() as conn:
+        conn.execute(text("DROP TRIGGER build_guides_version_update"))
+        conn.execute(text(
+            "CREATE TRIGGER build_guides_version_update AFTER UPDATE ON build_guides BEGIN "
+            "UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP "
+            "WHERE name = 'build_guides'; END"
+        ))
+    install_change_counters(engine)
+    with engine.connect() as conn:
+        sql = conn.execute(text(
+            "SELECT sql FROM sqlite_master WHERE name = 'build_guides_version_update'"
+        )).scalar()
+    assert "%f" in sql
+
+
+def test_if_modified_since_is_answered_once_the_second_is_over():
+    written = datetime.now(timezone.utc) - timedelta(seconds=5)
+    since = format_datetime(written, usegmt=True)
+    assert not_modified(request_with(if_modified_since=since), '"e"', written).status_code == 304
+
+    response = Response()
+    set_validators(response, '"e"', written)
+    assert response.headers["Last-Modified"] == since
+
+
+def test_writes_in_the_current_second_are_never_304_by_date():
+    written = datetime.now(timezone.utc).replace(microsecond=0)
+    since = format_datetime(written, usegmt=True)
+    # Another write could still land in this second under the same date
+    assert not_modified(request_with(if_modified_since=since), '"e"', written) is None
+
+    response = Response()
+    set_validators(response, '"e"', written)
+    assert "Last-Modified" not in response.headers
+    # The ETag still revalidates
+    assert not_modified(request_with(if_none_match='"e"'), '"e"', written).status_code == 304
+
+def test_adding_uploads_changes_the_etags(client):
+    guide_id, = add_guides(1, uploads=2)
+    list_etag = client.get("/api/guides/").headers["ETag"]
+    detail_etag = client.get(f"/api/guides/{guide_id}").headers["ETag"]
+
+    response = client.post(
+        f"/api/guides/{guide_id}/uploads",
+        data={"captions": ["A new caption"]},
+        files=[("images", ("new.png", io.BytesIO(png_bytes(1)), "image/png"))],
+    )
+    assert response.status_code == 201
+
+    detail = revalidate(client, f"/api/guides/{guide_id}", detail_etag)
+    assert detail.status_code == 200
+    assert len(detail.json()["uploads"]) == 3
+    listed = revalidate(client, "/api/guides/", list_etag)
+    assert listed.status_code == 200
+    assert len(listed.json()[0]["uploads"]) == 3
+
+
+def test_compressed_and_304_responses_share_the_etag(client):
+    add_guides(30)
+    headers = {"Accept-Encoding": "br"}
+    compressed = client.get("/api/guides/", headers=headers)
+    assert compressed.headers["Content-Encoding"] == "br"
+
+    not_modified = client.get("/api/guides/", headers={**headers, "If-None-Match": compressed.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == compressed.headers["ETag"]
+    plain = client.get("/api/guides/", headers={"Accept-Encoding": "identity"})
+    assert plain.headers["ETag"] == compressed.headers["ETag"]
@@ -0,0 +1,68 @@
+import base64
+import json
+
+import pytest
+
+from conftest import add_guides
+
+
+def make_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def test_pages_cover_the_list_once_in_order(client):
+    add_guides(23)
+    everything = [g["id"] for g in client.get("/api/guides/").json()]
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 5, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/guides/", params=params)
+        assert response.status_code == 200
+        seen += [g["id"] for g in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == everything
+    assert len(seen) == 23
+
+
+def test_character_pages_cover_the_catalog(client):
+    everything = [c["id"] for c in client.get("/api/characters/").json()]
+    first = client.get("/api/characters/", params={"limit": 3})
+    second = client.get("/api/characters/", params={"limit": 3, "cursor": first.headers["X-Next-Cursor"]})
+    assert [c["id"] for c in first.json() + second.json()] == everything
+    assert "X-Next-Cursor" not in second.headers
+
+
+@pytest.mark.parametrize("cursor", [
+    make_cursor(["notadate", 1]),
+    make_cursor([1, 2]),
+    make_cursor([None, None]),
+    make_cursor(["2024-01-01T00:00:00", True]),
+    make_cursor(["2024-01-01T00:00:00", "7"]),
+    make_cursor(["2024-01-01T00:00:00"]),
+    make_cursor(["2024-01-01T00:00:00", 2 ** 63]),
+    make_cursor(["2024-01-01T00:00:00", -2 ** 63 - 1]),
+    make_cursor({"id": 1}),
+    "not base64 json",
+])
+def test_bad_guide_cursor_is_400(client, cursor):
+    add_guides(3)
+    response = client.get("/api/guides/", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid pagination cursor"}
+
+
+@pytest.mark.parametrize("values", [[True], ["2"], [2.0], [1, 2], [], [10 ** 24]])
+def test_bad_character_cursor_is_400(client, values):
+    response = client.get("/api/characters/", params={"cursor": make_cursor(values)})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid pagination cursor"}
+
+
+def test_cursor_at_the_integer_limit_is_accepted(client):
+    add_guides(3)
+    response = client.get("/api/guides/", params={"cursor": make_cursor(["2024-01-01T00:00:00", 2 ** 63 - 1])})
+    assert response.status_code == 200
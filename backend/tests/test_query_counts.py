@@ -0,0 +1,66 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.config import settings
+from app.database import async_engine, async_read_engine, engine
+from app.services.response_cache import MemoryBackend, response_cache
+
+from conftest import CHARACTERS, add_guides
+
+
+@contextmanager
+def count_queries():
+    """Count statements sent to the database by any of the app's engines"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = {engine, async_engine.sync_engine, async_read_engine.sync_engine}
+    for e in engines:
+        event.listen(e, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for e in engines:
+            event.remove(e, "before_cursor_execute", record)
+
+
+def queries_for(client, url, **params):
+    """Statements run for ``url`` on a cache miss"""
+    response_cache.backend = MemoryBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+    with count_queries() as statements:
+        response = client.get(url, params=params)
+    assert response.status_code == 200
+    return len(statements)
+
+
+def seed(count, status="approved"):
+    """``count`` guides with two uploads each, spread over the characters"""
+    ids = []
+    for character_id in range(1, len(CHARACTERS) + 1):
+        ids += add_guides(count // len(CHARACTERS), status=status, uploads=2, character_id=character_id)
+    return ids
+
+
+@pytest.mark.parametrize("status, url", [
+    ("approved", "/api/guides/"),
+    ("pending", "/api/guides/pending"),
+])
+def test_guide_lists_run_a_fixed_number_of_queries(client, status, url):
+    seed(5, status)
+    queries_for(client, url, limit=settings.MAX_PAGE_SIZE)  # warm up connections and caches
+    few = queries_for(client, url, limit=settings.MAX_PAGE_SIZE)
+
+    seed(95, status)
+    many = queries_for(client, url, limit=settings.MAX_PAGE_SIZE)
+    assert many == few
+
+
+def test_guide_detail_runs_a_fixed_number_of_queries(client):
+    small, = add_guides(1, uploads=1)
+    large, = add_guides(1, uploads=40)
+    queries_for(client, f"/api/guides/{small}")
+    assert queries_for(client, f"/api/guides/{large}") == queries_for(client, f"/api/guides/{small}")
@@ -0,0 +1,108 @@
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models import BuildGuide
+from app.routes import build_guides
+from app.services.response_cache import MemoryBackend, ResponseCache, response_cache
+
+from conftest import add_guides, approve
+
+
+def listed_ids(client, **params):
+    return [g["id"] for g in client.get("/api/guides/", params=params).json()]
+
+
+def test_repeat_reads_are_served_from_the_cache(client):
+    guide_id, = add_guides(1)
+    client.get("/api/guides/")
+    client.get(f"/api/guides/{guide_id}")
+    client.get("/api/guides/")
+    client.get(f"/api/guides/{guide_id}")
+    assert response_cache.stats() == {"hits": 2, "misses": 2}
+
+
+def test_writes_invalidate_the_list_and_detail(client):
+    approved, pending = add_guides(1)[0], add_guides(1, status="pending")[0]
+    assert listed_ids(client) == [approved]
+    assert client.get(f"/api/guides/{pending}").json()["status"] == "pending"
+
+    approve(client, pending)
+    assert listed_ids(client) == [pending, approved]
+    assert client.get(f"/api/guides/{pending}").json()["status"] == "approved"
+
+    assert client.delete(f"/api/guides/{approved}").status_code == 200
+    assert listed_ids(client) == [pending]
+    assert client.get(f"/api/guides/{approved}").status_code == 404
+
+
+def test_write_during_a_miss_does_not_store_stale_data(client, monkeypatch):
+    approved, = add_guides(1)
+    pending, = add_guides(1, status="pending")
+    list_guides = build_guides.list_guides
+
+    async def approve_after_reading(db, status, filters):
+        # The guide is approved after this request has read the old list
+        result = await list_guides(db, status, filters)
+        monkeypatch.setattr(build_guides, "list_guides", list_guides)
+        async with AsyncSessionLocal() as write_db:
+            await build_guides.approve_guide(pending, write_db)
+        return result
+
+    monkeypatch.setattr(build_guides, "list_guides", approve_after_reading)
+    assert listed_ids(client) == [approved]
+    assert listed_ids(client) == [pending, approved]
+
+
+def test_writes_through_another_worker_are_seen(client):
+    guide_id, = add_guides(1)
+    detail = client.get(f"/api/guides/{guide_id}")
+    client.get("/api/guides/")
+
+    # Committed without invalidating this process' cache, as another worker would
+    with SessionLocal() as db:
+        db.get(BuildGuide, guide_id).title = "Changed elsewhere"
+        db.commit()
+
+    fresh = client.get(f"/api/guides/{guide_id}")
+    assert fresh.json()["title"] == "Changed elsewhere"
+    assert fresh.headers["ETag"] != detail.headers["ETag"]
+    assert client.get("/api/guides/").json()[0]["title"] == "Changed elsewhere"
+
+
+def test_entries_are_keyed_by_the_versions_read_with_the_etag():
+    cache = ResponseCache(MemoryBackend(10))
+    generation = cache.guide_generation(1)
+    cache.set_guide(1, generation, (3, 1, 1), b"{}")
+    assert cache.get_guide(1, generation, (3, 1, 1)) == b"{}"
+    assert cache.get_guide(1, generation, (4, 1, 1)) is None
+    assert cache.get_guide(1, generation, (3, 1, 2)) is None
+
+
+def test_entries_are_keyed_by_the_generation_read_first():
+    cache = ResponseCache(MemoryBackend(10))
+    generation = cache.approved_list_generation()
+    cache.invalidate_guide(1)
+    cache.set_approved_list("q", generation, (1, 1), b"[]", None)
+    assert cache.get_approved_list("q", cache.approved_list_generation(), (1, 1)) is None
+
+    generation = cache.guide_generation(1)
+    cache.invalidate_guide(1, approved_list=False)
+    cache.set_guide(1, generation, (1, 1), b"{}")
+    assert cache.get_guide(1, cache.guide_generation(1), (1, 1)) is None
+
+
+def test_generations_share_the_lru_bound():
+    backend = MemoryBackend(3)
+    cache = ResponseCache(backend)
+    generation = cache.guide_generation(1)
+    cache.set_guide(1, generation, (1,), b"{}")
+
+    # The generation key is the least recently used, so it goes first...
+    backend.set("other", b"")
+    backend.set("another", b"")
+    assert backend.get("guide:1:gen") is None
+    # ...but the entry stored under it is never served again
+    assert backend.get("guide:1") is not None
+    assert cache.get_guide(1, cache.guide_generation(1), (1,)) is None
+
+    for guide_id in range(10, 100):
+        cache.invalidate_guide(guide_id)
+    assert len(backend._entries) == 3
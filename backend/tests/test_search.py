@@ -0,0 +1,34 @@
+from app.database import SessionLocal
+from app.models import BuildGuide
+from app.services.search import to_match_query
+
+from conftest import add_guides
+
+
+def test_matches_are_prefixed_and_quoted():
+    assert to_match_query('hu "tao') == '"hu"* "tao"*'
+
+
+def test_highlights_are_escaped_around_the_marks(client):
+    guide_id, = add_guides(1)
+    with SessionLocal() as db:
+        guide = db.get(BuildGuide, guide_id)
+        guide.title = "<script>alert(1)</script> Geo battery"
+        guide.description = "Pairs well with <img src=x onerror=alert(1)> and more Geo units"
+        db.commit()
+
+    response = client.get("/api/search/", params={"q": "geo", "type": "guides"})
+    assert response.status_code == 200
+    hit, = response.json()["guides"]
+    assert hit["title"] == "<script>alert(1)</script> Geo battery"
+    assert hit["title_highlight"] == "&lt;script&gt;alert(1)&lt;/script&gt; <mark>Geo</mark> battery"
+    assert "<img" not in hit["snippet"]
+    assert "&lt;img src=x onerror=alert(1)&gt;" in hit["snippet"]
+    assert "<mark>Geo</mark>" in hit["snippet"]
+
+
+def test_character_names_are_searchable(client):
+    response = client.get("/api/search/", params={"q": "rai", "type": "characters"})
+    hit, = response.json()["characters"]
+    assert hit["name_highlight"] == "<mark>Raiden</mark> Shogun"
+    assert response.json()["guides"] == []
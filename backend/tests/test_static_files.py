@@ -0,0 +1,70 @@
+import pytest
+
+from conftest import png_bytes, post_guide
+
+
+@pytest.fixture
+def picture(client):
+    data = png_bytes(20, size=(200, 100))
+    path = post_guide(client, data).json()["picture_path"]
+    return f"/static/{path}", data
+
+
+def test_content_addressed_files_are_immutable(client, picture):
+    url, data = picture
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content == data
+    assert "immutable" in response.headers["Cache-Control"]
+    assert response.headers["Accept-Ranges"] == "bytes"
+
+    not_modified = client.get(url, headers={"If-None-Match": response.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == response.headers["ETag"]
+
+
+@pytest.mark.parametrize("header, start, end", [
+    ("bytes=0-9", 0, 9),
+    ("bytes=10-", 10, None),
+    ("bytes=-16", -16, None),
+    ("bytes=5-100000", 5, None),
+])
+def test_range_requests_get_206(client, picture, header, start, end):
+    url, data = picture
+    response = client.get(url, headers={"Range": header})
+    assert response.status_code == 206
+    expected = data[start:] if end is None else data[start:end + 1]
+    assert response.content == expected
+    first = start % len(data)
+    assert response.headers["Content-Range"] == f"bytes {first}-{first + len(expected) - 1}/{len(data)}"
+
+
+@pytest.mark.parametrize("header", ["bytes=100000-", "bytes=-0", "bytes=9-3"])
+def test_unsatisfiable_range_is_416(client, picture, header):
+    url, data = picture
+    response = client.get(url, headers={"Range": header})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(data)}"
+
+
+def test_unsupported_range_sends_the_whole_file(client, picture):
+    url, data = picture
+    response = client.get(url, headers={"Range": "bytes=0-1,4-5"})
+    assert response.status_code == 200
+    assert response.content == data
+
+
+def test_if_range_only_sends_part_of_the_same_file(client, picture):
+    url, data = picture
+    etag = client.get(url).headers["ETag"]
+    matching = client.get(url, headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert matching.status_code == 206
+    assert matching.content == data[:10]
+
+    stale = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"0123456789abcdef"'})
+    assert stale.status_code == 200
+    assert stale.content == data
+
+
+def test_missing_file_is_404(client):
+    assert client.get("/static/build_pics/cas/00/" + "0" * 64 + ".png").status_code == 404
@@ -23,7 +23,7 @@ export default function BuildGuides() {
     // Fetch characters and guides
     useEffect(() => {
         Promise.all([
-            fetch("http://127.0.0.1:8000/api/characters").then((r) => r.json()),
+            fetch("http://127.0.0.1:8000/api/characters/?fields=name").then((r) => r.json()),
             fetch("http://127.0.0.1:8000/api/guides").then((r) => r.json()),
         ])
             .then(([chars, gds]) => {
@@ -103,6 +103,12 @@ export default function BuildGuides() {
                 body: formData,
             });
 
+            if (res.status === 429 || res.status === 503) {
+                const wait = res.headers.get("Retry-After") || "a few";
+                alert(`The server is busy. Please try again in ${wait} seconds.`);
+                return;
+            }
+
             if (!res.ok) {
                 const text = await res.text();
                 console.error("Create failed:", res.status, text);
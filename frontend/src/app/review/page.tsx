@@ -3,12 +3,17 @@
 import { useEffect, useState } from 'react';
 import { useRouter } from 'next/navigation';
 import { isAuthenticated } from '@/lib/auth';
-import { BuildGuide } from '@/types';
+import { BuildGuide, ModerationResult } from '@/types';
+
+// The most actions POST /api/guides/bulk accepts at once
+const BULK_LIMIT = 1000;
 
 export default function PendingReviewPage() {
     const router = useRouter();
     const [guides, setGuides] = useState<BuildGuide[]>([]);
     const [loading, setLoading] = useState(true);
+    const [selected, setSelected] = useState<Set<number>>(new Set());
+    const [busy, setBusy] = useState(false);
 
     useEffect(() => {
         // Check authentication and admin role
@@ -17,17 +22,59 @@ export default function PendingReviewPage() {
             return;
         }
 
-        // Fetch pending guides
-        fetch('http://127.0.0.1:8000/api/guides/pending')
-            .then((res) => res.json())
-            .then((data) => {
-                setGuides(data);
-                setLoading(false);
-            })
-            .catch((err) => {
-                console.error('Failed to fetch pending guides:', err);
-                setLoading(false);
+        let events: EventSource | null = null;
+        let cancelled = false;
+
+        const fetchPending = () =>
+            fetch('http://127.0.0.1:8000/api/guides/pending').then((res) => {
+                const feedId = res.headers.get('X-Pending-Feed-Id');
+                return res.json().then((data: BuildGuide[]) => ({ data, feedId }));
+            });
+
+        // Fetch pending guides, then follow changes from the server
+        const load = () =>
+            fetchPending()
+                .then(({ data, feedId }) => {
+                    if (cancelled) return;
+                    setGuides(data);
+                    setLoading(false);
+                    events = listen(feedId);
+                })
+                .catch((err) => {
+                    console.error('Failed to fetch pending guides:', err);
+                    setLoading(false);
+                });
+
+        // Events that the fetched list already reflects are ignored
+        const listen = (feedId: string | null) => {
+            const query = feedId ? `?last_event_id=${encodeURIComponent(feedId)}` : '';
+            const source = new EventSource(`http://127.0.0.1:8000/api/guides/pending/stream${query}`);
+            source.addEventListener('add', (e) => {
+                const guide: BuildGuide = JSON.parse((e as MessageEvent).data);
+                setGuides((prev) => (prev.some((g) => g.id === guide.id) ? prev : [guide, ...prev]));
             });
+            source.addEventListener('remove', (e) => {
+                const { id } = JSON.parse((e as MessageEvent).data);
+                setGuides((prev) => prev.filter((g) => g.id !== id));
+            });
+            // Missed events (the server restarted, or this connection went to
+            // another worker): refetch the list but keep the stream, which
+            // carries on from the reset, so a reset can never repeat itself
+            source.addEventListener('reset', () => {
+                fetchPending()
+                    .then(({ data }) => {
+                        if (!cancelled) setGuides(data);
+                    })
+                    .catch((err) => console.error('Failed to refetch pending guides:', err));
+            });
+            return source;
+        };
+
+        load();
+        return () => {
+            cancelled = true;
+            events?.close();
+        };
     }, [router]);
 
     const handleApprove = async (id: number) => {
@@ -56,12 +103,75 @@ export default function PendingReviewPage() {
         }
     };
 
+    // Guides removed by the stream drop out of the selection too
+    const selectedIds = guides.filter((g) => selected.has(g.id)).map((g) => g.id);
+    const allSelected = guides.length > 0 && selectedIds.length === guides.length;
+
+    const toggle = (id: number) =>
+        setSelected((prev) => {
+            const next = new Set(prev);
+            if (next.has(id)) next.delete(id);
+            else next.add(id);
+            return next;
+        });
+
+    const toggleAll = () => setSelected(allSelected ? new Set() : new Set(guides.map((g) => g.id)));
+
+    // Moderate every selected guide with one request per BULK_LIMIT guides
+    const handleBulk = async (action: 'approve' | 'reject') => {
+        setBusy(true);
+        const done = new Set<number>();
+        try {
+            for (let start = 0; start < selectedIds.length; start += BULK_LIMIT) {
+                const batch = selectedIds.slice(start, start + BULK_LIMIT);
+                const res = await fetch('http://127.0.0.1:8000/api/guides/bulk', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ actions: batch.map((id) => ({ id, action })) }),
+                });
+                if (!res.ok) throw new Error(`Failed to ${action} guides`);
+                const { results }: { results: ModerationResult[] } = await res.json();
+                // not_found: someone else already approved or rejected it
+                results.forEach((r) => done.add(r.id));
+            }
+        } catch (err) {
+            console.error(err);
+            alert(`Error moderating guides; ${done.size} of ${selectedIds.length} were done`);
+        } finally {
+            setGuides((prev) => prev.filter((g) => !done.has(g.id)));
+            setSelected((prev) => new Set(Array.from(prev).filter((id) => !done.has(id))));
+            setBusy(false);
+        }
+    };
+
     if (loading) return <div className="p-10 text-center">Loading pending guides...</div>;
 
     return (
         <div className="min-h-screen bg-gray-100 p-8">
             <h1 className="text-black text-3xl font-bold mb-6">Pending Build Guides</h1>
             {guides.length === 0 && <p className="text-gray-600">No pending guides at the moment.</p>}
+            {guides.length > 0 && (
+                <div className="flex items-center gap-3 mb-4">
+                    <label className="flex items-center gap-2 text-black">
+                        <input type="checkbox" checked={allSelected} onChange={toggleAll} />
+                        Select all
+                    </label>
+                    <button
+                        onClick={() => handleBulk('approve')}
+                        disabled={busy || selectedIds.length === 0}
+                        className="px-4 py-2 bg-green-500 text-white rounded-lg hover:bg-green-600 disabled:opacity-50"
+                    >
+                        Approve selected ({selectedIds.length})
+                    </button>
+                    <button
+                        onClick={() => handleBulk('reject')}
+                        disabled={busy || selectedIds.length === 0}
+                        className="px-4 py-2 bg-red-500 text-white rounded-lg hover:bg-red-600 disabled:opacity-50"
+                    >
+                        Reject selected ({selectedIds.length})
+                    </button>
+                </div>
+            )}
             <div className="space-y-4">
                 {guides.map((guide) => (
                     <div
@@ -69,6 +179,12 @@ export default function PendingReviewPage() {
                         className="border-2 border-gray-300 rounded-2xl p-6 hover:shadow-xl transition-all hover:scale-[1.02] bg-gradient-to-br from-gray-50 to-white"
                     >
                         <div className="flex items-center space-x-4">
+                            <input
+                                type="checkbox"
+                                checked={selected.has(guide.id)}
+                                onChange={() => toggle(guide.id)}
+                                aria-label={`Select ${guide.title}`}
+                            />
                             <img
                                 src={`http://127.0.0.1:8000/static/build_pics/default.jpg`}
                                 alt="default"
@@ -39,4 +39,10 @@ export interface User {
     id: number;
     email: string;
     role: string;
-}
\ No newline at end of file
+}
+
+export interface ModerationResult {
+    id: number;
+    action: 'approve' | 'reject';
+    result: 'approved' | 'rejected' | 'not_found' | 'duplicate';
+}